@@ -7,12 +7,45 @@
 Каждая модель имеет свой класс ModelAdmin с настройками, оптимизированными для работы с данными сервисного центра.
 """
 
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.http import HttpResponseRedirect
+from django.utils import timezone
+from django.utils.functional import cached_property
 from .models import (
     Role, UserRole, Client, EquipmentCategory,
-    Brand, EquipmentModel, ReceptionAct, ReceivedEquipment
+    Brand, EquipmentModel, ReceptionAct, ReceivedEquipment, EquipmentStatusTransition, EquipmentStatusCounter,
+    EquipmentEvent,
 )
 
+
+def _count_related(model, field_name):
+    """
+    Количество связанных записей для аннотации списка в админке.
+
+    Коррелированный подзапрос по индексу внешнего ключа: считаются только
+    строки показанной страницы, без GROUP BY по всей связанной таблице
+    и без отдельного COUNT на каждую строку.
+
+    Args:
+        model: Связанная модель
+        field_name (str): Внешний ключ связанной модели на текущую
+
+    Returns:
+        Coalesce: Выражение для annotate()
+    """
+    counts = model.objects.filter(
+        **{field_name: OuterRef('pk')}
+    ).order_by().values(field_name).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
 # 1. РЕГИСТРАЦИЯ СТАНДАРТНОЙ МОДЕЛИ USER С ДОПОЛНИТЕЛЬНЫМИ ПОЛЯМИ
 # -----------------------------------------------------------------
 class UserRoleInline(admin.TabularInline):
@@ -113,6 +146,15 @@ class EquipmentCategoryAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_queryset(self, request):
+        """
+        Количество брендов и моделей считается в запросе списка.
+        """
+        return super().get_queryset(request).annotate(
+            brands_count=_count_related(Brand, 'category'),
+            models_count=_count_related(EquipmentModel, 'category'),
+        )
+
     def get_brands_count(self, obj):
         """
         Отображает количество брендов в категории.
@@ -123,9 +165,10 @@ class EquipmentCategoryAdmin(admin.ModelAdmin):
         Returns:
             int: Количество брендов
         """
-        return obj.brands.count()
+        return obj.brands_count
 
     get_brands_count.short_description = "Кол-во брендов"
+    get_brands_count.admin_order_field = 'brands_count'
 
     def get_models_count(self, obj):
         """
@@ -137,9 +180,10 @@ class EquipmentCategoryAdmin(admin.ModelAdmin):
         Returns:
             int: Количество моделей
         """
-        return obj.models.count()
+        return obj.models_count
 
     get_models_count.short_description = "Кол-во моделей"
+    get_models_count.admin_order_field = 'models_count'
 
 
 # 6. АДМИНКА ДЛЯ МОДЕЛИ BRAND
@@ -162,6 +206,12 @@ class BrandAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_queryset(self, request):
+        """
+        Количество моделей считается в запросе списка.
+        """
+        return super().get_queryset(request).annotate(models_count=_count_related(EquipmentModel, 'brand'))
+
     def get_models_count(self, obj):
         """
         Отображает количество моделей у бренда.
@@ -172,9 +222,10 @@ class BrandAdmin(admin.ModelAdmin):
         Returns:
             int: Количество моделей
         """
-        return obj.models.count()
+        return obj.models_count
 
     get_models_count.short_description = "Кол-во моделей"
+    get_models_count.admin_order_field = 'models_count'
 
 
 # 7. АДМИНКА ДЛЯ МОДЕЛИ EQUIPMENTMODEL
@@ -197,6 +248,12 @@ class EquipmentModelAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_queryset(self, request):
+        """
+        Количество принятого оборудования считается в запросе списка.
+        """
+        return super().get_queryset(request).annotate(equipment_count=_count_related(ReceivedEquipment, 'model'))
+
     def get_equipment_count(self, obj):
         """
         Отображает количество принятого оборудования этой модели.
@@ -207,9 +264,10 @@ class EquipmentModelAdmin(admin.ModelAdmin):
         Returns:
             int: Количество оборудования
         """
-        return obj.receivedequipment_set.count()
+        return obj.equipment_count
 
     get_equipment_count.short_description = "Принято единиц"
+    get_equipment_count.admin_order_field = 'equipment_count'
 
 
 # 8. АДМИНКА ДЛЯ МОДЕЛИ RECEPTIONACT
@@ -257,6 +315,14 @@ class ReceptionActAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_queryset(self, request):
+        """
+        Количество оборудования считается в запросе списка.
+        """
+        return super().get_queryset(request).annotate(
+            equipment_count=_count_related(ReceivedEquipment, 'reception_act')
+        )
+
     def get_equipment_count(self, obj):
         """
         Отображает количество оборудования в акте.
@@ -267,9 +333,10 @@ class ReceptionActAdmin(admin.ModelAdmin):
         Returns:
             int: Количество оборудования
         """
-        return obj.equipments.count()
+        return obj.equipment_count
 
     get_equipment_count.short_description = "Кол-во оборудования"
+    get_equipment_count.admin_order_field = 'equipment_count'
 
     def mark_as_printed(self, request, queryset):
         """
@@ -290,6 +357,179 @@ class ReceptionActAdmin(admin.ModelAdmin):
 
 # 9. АДМИНКА ДЛЯ МОДЕЛИ RECEIVEDEQUIPMENT
 # -----------------------------------------------------------------
+class EquipmentPaginator(Paginator):
+    """
+    Постраничная навигация списка оборудования без COUNT(*) по всей таблице.
+
+    Без фильтров количество берётся из счётчиков по цеху и статусу
+    (EquipmentStatusCounter). С фильтрами и поиском считается не больше
+    COUNT_LIMIT строк: при большем количестве список показывает первые
+    COUNT_LIMIT, а остальное находится уточнением фильтров.
+    """
+
+    COUNT_LIMIT = 10000
+
+    @cached_property
+    def count(self):
+        if not self.object_list.query.where:
+            return EquipmentStatusCounter.objects.aggregate(total=Sum('count'))['total'] or 0
+        return self.object_list.order_by()[:self.COUNT_LIMIT].count()
+
+
+class PriorityListFilter(admin.SimpleListFilter):
+    """
+    Фильтр по приоритету из PRIORITY_CHOICES.
+
+    Стандартный фильтр поля без choices выбирает DISTINCT по всей таблице.
+    """
+    title = "Приоритет"
+    parameter_name = 'priority'
+
+    def lookups(self, request, model_admin):
+        return ReceivedEquipment.PRIORITY_CHOICES
+
+    def queryset(self, request, queryset):
+        if self.value() is None:
+            return queryset
+        try:
+            return queryset.filter(priority=int(self.value()))
+        except ValueError as e:
+            raise IncorrectLookupParameters(e)
+
+
+class SpecialistAutocompleteFilter(admin.SimpleListFilter):
+    """
+    Фильтр по назначенному специалисту с поиском (autocomplete админки).
+
+    Варианты не загружаются списком: выбранный специалист ищется
+    тем же запросом, что и в поле формы оборудования.
+    """
+    title = "Назначенный специалист"
+    parameter_name = 'assigned_specialist'
+    template = 'admin/service_center/autocomplete_filter.html'
+
+    def lookups(self, request, model_admin):
+        return ()
+
+    def has_output(self):
+        return True
+
+    def queryset(self, request, queryset):
+        if self.value() is None:
+            return queryset
+        try:
+            return queryset.filter(assigned_specialist_id=int(self.value()))
+        except ValueError as e:
+            raise IncorrectLookupParameters(e)
+
+    def choices(self, changelist):
+        field = ReceivedEquipment._meta.get_field('assigned_specialist')
+        form_field = forms.ModelChoiceField(
+            queryset=UserRole.objects.select_related('user', 'role'),
+            widget=AutocompleteSelect(field, admin.site),
+            required=False,
+        )
+        yield {
+            'selected': self.value() is not None,
+            'widget': form_field.widget.render(self.parameter_name, self.value(), attrs={
+                'id': 'specialistFilter',
+                'data-query-string': changelist.get_query_string(remove=[self.parameter_name, 'p']),
+            }),
+        }
+
+
+class EquipmentStatusTransitionInline(admin.TabularInline):
+    """
+    История статусов на странице оборудования (только просмотр).
+
+    Записи добавляются автоматически при смене статуса.
+    """
+    model = EquipmentStatusTransition
+    extra = 0
+    fields = ('at', 'from_status', 'to_status')
+    readonly_fields = fields
+    can_delete = False
+    verbose_name = "Переход статуса"
+    verbose_name_plural = "История статусов"
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+class ReceivedEquipmentAdminForm(forms.ModelForm):
+    """
+    Форма оборудования в админке с версией записи, которую видел пользователь.
+
+    Если оборудование изменили после открытия формы, сохранение отклоняется,
+    а не перезаписывает чужие изменения.
+    """
+    expected_version = forms.IntegerField(widget=forms.HiddenInput, required=False)
+
+    class Meta:
+        model = ReceivedEquipment
+        fields = '__all__'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk:
+            self.fields['expected_version'].initial = self.instance.version
+
+    def clean(self):
+        cleaned_data = super().clean()
+        version = cleaned_data.get('expected_version')
+        # Строка списка без правок не сохраняется и устаревшей не считается
+        edited = [name for name in self.changed_data if name != 'expected_version']
+        if self.instance.pk and edited and version is not None and version != ReceivedEquipment.objects.filter(
+            pk=self.instance.pk
+        ).values_list('version', flat=True).first():
+            raise forms.ValidationError(
+                "Оборудование уже изменено другим пользователем. Откройте запись заново и повторите изменения."
+            )
+        return cleaned_data
+
+
+class _RowVersionInput(forms.HiddenInput):
+    """
+    Скрытое поле ID строки списка вместе со скрытым полем версии записи.
+
+    Список в админке выводит из формы строки только поля list_editable
+    и скрытый ID, поэтому версия выводится вместе с ID.
+    """
+
+    def __init__(self, version_field, attrs=None):
+        super().__init__(attrs)
+        self.version_field = version_field
+
+    def render(self, name, value, attrs=None, renderer=None):
+        return super().render(name, value, attrs, renderer) + str(self.version_field)
+
+
+class ReceivedEquipmentChangelistFormSet(forms.BaseModelFormSet):
+    """
+    Формы строк списка оборудования (list_editable) с проверкой версии.
+
+    Каждая строка отправляет версию, которую видел пользователь; устаревшие
+    строки не сохраняются, а ошибка выводится над списком.
+    """
+
+    def add_fields(self, form, index):
+        super().add_fields(form, index)
+        pk_name = self.model._meta.pk.name
+        form.fields[pk_name].widget = _RowVersionInput(form['expected_version'])
+
+    def clean(self):
+        super().clean()
+        stale = [
+            f"#{form.instance.pk}" for form in self.forms
+            if form.instance.pk and form.has_error(forms.forms.NON_FIELD_ERRORS)
+        ]
+        if stale:
+            raise forms.ValidationError(
+                "Оборудование %s уже изменено другим пользователем. Обновите страницу и повторите изменения."
+                % ', '.join(stale)
+            )
+
+
 @admin.register(ReceivedEquipment)
 class ReceivedEquipmentAdmin(admin.ModelAdmin):
     """
@@ -297,16 +537,22 @@ class ReceivedEquipmentAdmin(admin.ModelAdmin):
 
     Отдельные единицы оборудования, принятые по актам приёмки.
     """
+    form = ReceivedEquipmentAdminForm
+    inlines = [EquipmentStatusTransitionInline]
     list_display = (
         'get_full_name', 'reception_act', 'serial_number',
         'status', 'priority', 'assigned_specialist', 'created_at'
     )
-    list_filter = ('status', 'guarantee_type', 'priority', 'created_at', 'assigned_specialist')
+    list_filter = ('status', 'guarantee_type', PriorityListFilter, 'created_at', SpecialistAutocompleteFilter)
+    # Поиск выполняет get_search_results() по индексам; список - для поля поиска и подсказки
     search_fields = (
         'serial_number', 'inventory_number',
         'model__name', 'model__brand__name',
         'reception_act__act_number'
     )
+    search_help_text = "Начало серийного, инвентарного номера, номера акта, модели или бренда"
+    paginator = EquipmentPaginator
+    show_full_result_count = False  # Без второго COUNT(*) по всей таблице
     readonly_fields = ('created_at', 'updated_at')
     autocomplete_fields = ('reception_act', 'model', 'assigned_specialist')
     list_select_related = ('reception_act', 'model', 'model__brand', 'model__category', 'assigned_specialist')
@@ -314,7 +560,7 @@ class ReceivedEquipmentAdmin(admin.ModelAdmin):
     actions = ['assign_default_specialist', 'set_high_priority']
     fieldsets = (
         ('Основная информация', {
-            'fields': ('reception_act', 'model', 'serial_number', 'inventory_number')
+            'fields': ('reception_act', 'model', 'serial_number', 'inventory_number', 'expected_version')
         }),
         ('Описание проблемы', {
             'fields': ('defect_description',)
@@ -378,11 +624,110 @@ class ReceivedEquipmentAdmin(admin.ModelAdmin):
             request: Объект запроса
             queryset: Выбранные объекты оборудования
         """
-        updated = queryset.update(priority=80)
+        equipment_ids = list(queryset.values_list('pk', flat=True))
+        with transaction.atomic():
+            updated = ReceivedEquipment.objects.filter(pk__in=equipment_ids).update(
+                priority=80, version=F('version') + 1, updated_at=timezone.now()
+            )
+            # QuerySet.update() не отправляет post_save: событие для панелей записывается здесь
+            EquipmentEvent.record(ReceivedEquipment.objects.filter(pk__in=equipment_ids), 'updated')
         self.message_user(request, f"Высокий приоритет установлен для {updated} единиц оборудования.")
 
     set_high_priority.short_description = "Установить высокий приоритет"
 
+    def save_model(self, request, obj, form, change):
+        """
+        Сохраняет только изменённые в форме поля с проверкой версии записи.
+
+        Так правка статуса из списка не перезаписывает поля, которые
+        в это время изменил другой пользователь.
+
+        Args:
+            request: Объект запроса
+            obj: Объект оборудования
+            form: Форма (страницы оборудования или строки списка)
+            change: True при изменении существующего оборудования
+        """
+        if not change:
+            obj.save()
+            return
+
+        model_fields = {field.name for field in obj._meta.concrete_fields}
+        try:
+            obj.save(
+                update_fields=[name for name in form.changed_data if name in model_fields],
+                expected_version=form.cleaned_data.get('expected_version'),
+            )
+        except ReceivedEquipment.VersionConflict:
+            # Запись изменили между проверкой формы и сохранением
+            request._equipment_version_conflict = True
+            self.message_user(
+                request,
+                f"Оборудование #{obj.pk} уже изменено другим пользователем, изменения не сохранены. "
+                f"Откройте запись заново и повторите изменения.",
+                level=messages.ERROR,
+            )
+
+    def response_change(self, request, obj):
+        """
+        После конфликта версий - снова страница оборудования без сообщения об успешном сохранении.
+        """
+        if getattr(request, '_equipment_version_conflict', False):
+            return HttpResponseRedirect(request.path)
+        return super().response_change(request, obj)
+
+    def get_changelist_form(self, request, **kwargs):
+        kwargs.setdefault('form', ReceivedEquipmentAdminForm)
+        return super().get_changelist_form(request, **kwargs)
+
+    def get_changelist_formset(self, request, **kwargs):
+        kwargs.setdefault('formset', ReceivedEquipmentChangelistFormSet)
+        return super().get_changelist_formset(request, **kwargs)
+
+    @property
+    def media(self):
+        # Скрипты autocomplete для фильтра специалистов в списке
+        field = ReceivedEquipment._meta.get_field('assigned_specialist')
+        return super().media + AutocompleteSelect(field, self.admin_site).media
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Поиск по началу номеров и номера акта и по модели или бренду.
+
+        Номера ищутся диапазоном по нормализованным полям (индекс), акты -
+        по началу номера акта (уникальный индекс), модели и бренды - по
+        началу наименования в небольших таблицах каталога; оборудование
+        выбирается по индексам внешних ключей. LIKE '%...%' не выполняется.
+
+        Args:
+            request: Объект запроса
+            queryset: Выборка оборудования
+            search_term (str): Текст поиска
+
+        Returns:
+            tuple: (QuerySet, есть ли дубликаты)
+        """
+        text = search_term.strip()
+        if not text:
+            return queryset, False
+
+        condition = Q(
+            reception_act__in=ReceptionAct.objects.filter(
+                act_number__gte=text, act_number__lt=text + chr(0x10FFFF)
+            ).values('pk')
+        ) | Q(
+            model__in=EquipmentModel.objects.filter(
+                Q(name__istartswith=text) | Q(brand__name__istartswith=text)
+            ).values('pk')
+        )
+
+        number = ReceivedEquipment.normalize_number(text)
+        if number:
+            for field in ReceivedEquipment.NUMBER_SEARCH_FIELDS.values():
+                condition |= Q(**{f'{field}__gte': number, f'{field}__lt': number + chr(0x10FFFF)})
+
+        return queryset.filter(condition), False
+
     def get_queryset(self, request):
         """
         Оптимизация запросов к базе данных.
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class ServiceCenterConfig(AppConfig):
     name = 'service_center'
+
+    def ready(self):
+        # Регистрация обработчиков сигналов
+        from . import signals  # noqa: F401
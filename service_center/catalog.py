@@ -0,0 +1,171 @@
+"""
+Каталог оборудования для формы акта приёмки.
+
+Списки брендов категории и моделей бренда отдаются по запросу
+(API /api/catalog/...) и хранятся в кэше в виде готового JSON под ключом
+текущей версии каталога. Версия меняется при любом изменении категорий,
+брендов и моделей (см. signals.py), после чего ответы строятся заново.
+"""
+
+import hashlib
+import json
+import uuid
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Brand, CatalogDeletion, EquipmentCategory, EquipmentModel
+
+# Ключ, под которым хранится текущая версия каталога
+CATALOG_VERSION_KEY = 'catalog:version'
+
+# Время жизни ответов в кэше (сутки); устаревшие версии вытесняются сами
+CATALOG_PAYLOAD_TIMEOUT = 60 * 60 * 24
+
+# Перекрытие окна синхронизации: запись, сохранённая во время выборки изменений,
+# попадёт и в следующую выборку (повторное применение изменений безопасно)
+CATALOG_SYNC_OVERLAP = timedelta(seconds=5)
+
+
+def get_catalog_version():
+    """
+    Текущая версия каталога.
+
+    Если версия отсутствует в кэше (первый запуск или вытеснение),
+    создаётся новая, поэтому ранее сохранённые ответы не будут использованы.
+
+    Returns:
+        str: Идентификатор версии каталога
+    """
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        # add() не перезапишет версию, если её успел создать другой запрос
+        if not cache.add(CATALOG_VERSION_KEY, version, None):
+            version = cache.get(CATALOG_VERSION_KEY, version)
+    return version
+
+
+def bump_catalog_version():
+    """
+    Делает кэшированные ответы каталога недействительными.
+
+    Вызывается после сохранения или удаления категорий, брендов и моделей.
+
+    Returns:
+        str: Новая версия каталога
+    """
+    version = uuid.uuid4().hex
+    cache.set(CATALOG_VERSION_KEY, version, None)
+    return version
+
+
+def _get_cached_payload(kind, object_id, build):
+    """
+    Готовый JSON-ответ каталога из кэша текущей версии (или построенный заново).
+
+    Вместе с телом хранится сильный ETag (хеш содержимого), поэтому
+    повторный запрос с тем же If-None-Match не обращается к базе данных.
+
+    Args:
+        kind (str): Вид данных ('brands' или 'models')
+        object_id (int): ID категории или бренда
+        build (callable): Функция, возвращающая данные для сериализации
+
+    Returns:
+        dict: body (str) и etag (str)
+    """
+    payload_key = f'catalog:{kind}:{get_catalog_version()}:{object_id}'
+    payload = cache.get(payload_key)
+    if payload is None:
+        body = json.dumps(build(), ensure_ascii=False, separators=(',', ':'))
+        payload = {
+            'body': body,
+            'etag': '"%s"' % hashlib.sha1(body.encode('utf-8')).hexdigest(),
+        }
+        cache.set(payload_key, payload, CATALOG_PAYLOAD_TIMEOUT)
+    return payload
+
+
+def get_brands_payload(category_id):
+    """
+    Бренды категории для выпадающего списка формы акта.
+
+    Args:
+        category_id (int): ID категории оборудования
+
+    Returns:
+        dict: body (str) и etag (str)
+    """
+    return _get_cached_payload('brands', category_id, lambda: {
+        'category_id': category_id,
+        'brands': list(
+            Brand.objects.filter(category_id=category_id).order_by('name').values('id', 'name')
+        ),
+    })
+
+
+def get_models_payload(brand_id):
+    """
+    Модели бренда для выпадающего списка формы акта.
+
+    Args:
+        brand_id (int): ID бренда
+
+    Returns:
+        dict: body (str) и etag (str)
+    """
+    return _get_cached_payload('models', brand_id, lambda: {
+        'brand_id': brand_id,
+        'models': list(
+            EquipmentModel.objects.filter(brand_id=brand_id).order_by('name').values('id', 'name')
+        ),
+    })
+
+
+def get_catalog_changes(since=None):
+    """
+    Изменения каталога с указанного момента для локальной копии на клиенте.
+
+    Формат записей совпадает с ответами add_category, add_brand и add_model.
+    Без since возвращается весь каталог (первая синхронизация).
+
+    Args:
+        since (datetime): Момент предыдущей синхронизации (значение until)
+
+    Returns:
+        dict: until, full, categories, brands, models и deleted
+    """
+    until = timezone.now()
+
+    categories = EquipmentCategory.objects.all()
+    brands = Brand.objects.all()
+    models = EquipmentModel.objects.all()
+    deletions = CatalogDeletion.objects.none()
+
+    if since is not None:
+        changed_after = since - CATALOG_SYNC_OVERLAP
+        categories = categories.filter(updated_at__gt=changed_after)
+        brands = brands.filter(updated_at__gt=changed_after)
+        models = models.filter(updated_at__gt=changed_after)
+        deletions = CatalogDeletion.objects.filter(deleted_at__gt=changed_after)
+
+    department_names = dict(EquipmentCategory.DEPARTAMENT_CHOICES)
+    deleted = {'categories': [], 'brands': [], 'models': []}
+    deleted_keys = {'category': 'categories', 'brand': 'brands', 'model': 'models'}
+    for kind, object_id in deletions.values_list('kind', 'object_id'):
+        deleted[deleted_keys[kind]].append(object_id)
+
+    return {
+        'until': until.isoformat(),
+        'full': since is None,
+        'categories': [
+            {'id': category['id'], 'name': category['name'],
+             'department': department_names.get(category['department'], category['department'])}
+            for category in categories.order_by().values('id', 'name', 'department')
+        ],
+        'brands': list(brands.order_by().values('id', 'name', 'category_id')),
+        'models': list(models.order_by().values('id', 'name', 'brand_id', 'category_id')),
+        'deleted': deleted,
+    }
@@ -8,7 +8,7 @@ from functools import wraps
 
 from django.shortcuts import redirect
 
-from .models import UserRole
+from .roles import has_role
 
 
 # def role_required(role_name):
@@ -61,13 +61,7 @@ def any_role_required(role_names):
         @login_required
         def _wrapped_view(request, *args, **kwargs):
             # Проверяем, есть ли у пользователя хотя бы одна из указанных ролей
-            has_role = UserRole.objects.filter(
-                user=request.user,
-                role__name__in=role_names,
-                is_active=True
-            ).exists()
-
-            if not has_role:
+            if not has_role(request, *role_names):
                 role_list = "', '".join(role_names)
                 raise PermissionDenied(
                     f"Для доступа к этой странице требуется одна из ролей: '{role_list}'"
@@ -89,13 +83,7 @@ def role_required(role_name):
                 return redirect('login')
 
             # Проверяем, есть ли у пользователя активная роль
-            has_role = UserRole.objects.filter(
-                user=request.user,
-                role__name=role_name,
-                is_active=True
-            ).exists()
-
-            if not has_role:
+            if not has_role(request, role_name):
                 raise PermissionDenied("У вас нет доступа к этой странице")
 
             return view_func(request, *args, **kwargs)
@@ -0,0 +1,199 @@
+"""
+Потоковая выгрузка таблиц в CSV и XLSX.
+
+Строки читаются из базы частями (QuerySet.values_list().iterator()) и сразу
+отдаются клиенту, поэтому расход памяти не зависит от количества строк.
+Под ASGI синхронный генератор нужно обернуть в iterate_async(): иначе
+StreamingHttpResponse сначала соберёт его целиком в список.
+XLSX собирается стандартным zipfile прямо в поток ответа (размеры частей
+архива записываются после данных), без сторонних библиотек.
+"""
+
+import csv
+import io
+import re
+import zipfile
+from decimal import Decimal
+from xml.sax.saxutils import escape, quoteattr
+
+from asgiref.sync import sync_to_async
+
+# Количество строк, читаемых из базы за один запрос курсора
+EXPORT_CHUNK_SIZE = 2000
+
+# Форматы выгрузки: тип содержимого ответа
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+# Символы, недопустимые в XML (встречаются во вставленном из других программ тексте)
+_XML_INVALID_CHARS_RE = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+_XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+
+_XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+
+_XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name=%s sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+_XLSX_SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+
+_XLSX_SHEET_END = '</sheetData></worksheet>'
+
+
+class _Echo:
+    """
+    Файлоподобный объект для csv.writer: возвращает записанную строку.
+    """
+
+    def write(self, value):
+        return value
+
+
+class _StreamBuffer(io.RawIOBase):
+    """
+    Поток без перемотки для zipfile: накапливает записанные байты
+    до следующей отдачи клиенту.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def pop(self):
+        """
+        Записанные с прошлого вызова байты.
+        """
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_csv(header, rows):
+    """
+    CSV построчно (разделитель ";" и BOM - для Excel с русскими настройками).
+
+    Args:
+        header (list): Заголовки столбцов
+        rows (iterable): Строки значений
+
+    Yields:
+        str: Части файла
+    """
+    writer = csv.writer(_Echo(), delimiter=';')
+    yield '\ufeff' + writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def _xlsx_cell(value):
+    """
+    Ячейка листа XLSX: числа - числом, остальное - строкой внутри ячейки.
+    """
+    if value is None or value == '':
+        return '<c/>'
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        return f'<c><v>{value}</v></c>'
+    text = escape(_XML_INVALID_CHARS_RE.sub('', str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_row(values):
+    return '<row>' + ''.join(_xlsx_cell(value) for value in values) + '</row>'
+
+
+def stream_xlsx(header, rows, sheet_name='Лист1'):
+    """
+    Книга XLSX с одним листом, собираемая по мере чтения строк.
+
+    Args:
+        header (list): Заголовки столбцов
+        rows (iterable): Строки значений
+        sheet_name (str): Название листа (не длиннее 31 символа)
+
+    Yields:
+        bytes: Части файла
+    """
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', _XLSX_CONTENT_TYPES)
+        archive.writestr('_rels/.rels', _XLSX_ROOT_RELS)
+        archive.writestr('xl/workbook.xml', _XLSX_WORKBOOK % quoteattr(sheet_name[:31]))
+        archive.writestr('xl/_rels/workbook.xml.rels', _XLSX_WORKBOOK_RELS)
+
+        with archive.open('xl/worksheets/sheet1.xml', 'w') as sheet:
+            sheet.write((_XLSX_SHEET_START + _xlsx_row(header)).encode('utf-8'))
+            for index, row in enumerate(rows, start=1):
+                sheet.write(_xlsx_row(row).encode('utf-8'))
+                if index % EXPORT_CHUNK_SIZE == 0:
+                    yield buffer.pop()
+            sheet.write(_XLSX_SHEET_END.encode('utf-8'))
+    yield buffer.pop()
+
+
+async def iterate_async(chunks):
+    """
+    Асинхронный итератор по частям синхронного генератора выгрузки.
+
+    Каждая часть запрашивается через sync_to_async в том же потоке, где
+    открыт курсор базы, и сразу отдаётся клиенту. Генератор закрывается
+    и при обрыве соединения.
+
+    Args:
+        chunks (iterable): Части файла (stream_csv() или stream_xlsx())
+
+    Yields:
+        str | bytes: Части файла
+    """
+    chunks = iter(chunks)
+    next_chunk = sync_to_async(next)
+    end = object()
+    try:
+        while (chunk := await next_chunk(chunks, end)) is not end:
+            yield chunk
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            await sync_to_async(close)()
@@ -0,0 +1,278 @@
+"""
+Фильтры и постраничная навигация для списков оборудования на панелях.
+
+Постраничная навигация - keyset (по курсору): следующая страница выбирается
+условием "после последней показанной строки" по паре (время, id), поэтому
+стоимость страницы не зависит от её номера и общего числа строк.
+"""
+
+import base64
+import json
+from datetime import datetime, time, timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Client, EquipmentCategory, ReceivedEquipment
+
+# Размер страницы списков оборудования по умолчанию
+DEFAULT_PAGE_SIZE = 50
+
+# Названия GET-параметров фильтров оборудования
+EQUIPMENT_FILTER_PARAMS = ('status', 'department', 'client', 'guarantee', 'priority', 'min_days', 'max_days')
+
+
+def _parse_int(value):
+    """
+    Целое число из GET-параметра или None.
+    """
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _local_day_start(day):
+    """
+    Начало суток в текущем часовом поясе.
+
+    Args:
+        day (date): Дата
+
+    Returns:
+        datetime: Полночь указанной даты с часовым поясом
+    """
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def get_equipment_filters(params):
+    """
+    Допустимые значения фильтров оборудования из GET-параметров.
+
+    Некорректные значения отбрасываются.
+
+    Args:
+        params (QueryDict): GET-параметры запроса
+
+    Returns:
+        dict: Фильтры (только заданные и корректные)
+    """
+    filters = {}
+
+    status = params.get('status')
+    if status in dict(ReceivedEquipment.STATUS_CHOICES):
+        filters['status'] = status
+
+    department = params.get('department')
+    if department in dict(EquipmentCategory.DEPARTAMENT_CHOICES):
+        filters['department'] = department
+
+    client = (params.get('client') or '').strip()
+    if client:
+        filters['client'] = client
+
+    guarantee = params.get('guarantee')
+    if guarantee in dict(ReceivedEquipment.GUARANTEE_CHOICES):
+        filters['guarantee'] = guarantee
+
+    priority = _parse_int(params.get('priority'))
+    if priority is not None:
+        filters['priority'] = priority
+
+    for name in ('min_days', 'max_days'):
+        days = _parse_int(params.get(name))
+        if days is not None and days >= 0:
+            filters[name] = days
+
+    return filters
+
+
+def filter_equipment(queryset, filters):
+    """
+    Применяет фильтры панели к выборке оборудования.
+
+    Возраст (дней в ремонте) фильтруется диапазоном по created_at,
+    чтобы условие использовало индекс.
+
+    Args:
+        queryset (QuerySet): Выборка ReceivedEquipment
+        filters (dict): Результат get_equipment_filters()
+
+    Returns:
+        QuerySet: Отфильтрованная выборка
+    """
+    if 'status' in filters:
+        queryset = queryset.filter(status=filters['status'])
+
+    if 'department' in filters:
+        queryset = queryset.filter(department=filters['department'])
+
+    if 'client' in filters:
+        prefix = Client.normalize_search_text(filters['client'])
+        queryset = queryset.filter(
+            reception_act__client__search_short_name__gte=prefix,
+            reception_act__client__search_short_name__lt=prefix + chr(0x10FFFF),
+        )
+
+    if 'guarantee' in filters:
+        queryset = queryset.filter(guarantee_type=filters['guarantee'])
+
+    if 'priority' in filters:
+        queryset = queryset.filter(priority=filters['priority'])
+
+    today = timezone.localdate()
+    if 'min_days' in filters:
+        # Не меньше N дней в ремонте: принято раньше, чем N-1 суток назад
+        queryset = queryset.filter(
+            created_at__lt=_local_day_start(today - timedelta(days=filters['min_days'] - 1))
+        )
+    if 'max_days' in filters:
+        # Не больше M дней в ремонте: принято не раньше, чем M суток назад
+        queryset = queryset.filter(
+            created_at__gte=_local_day_start(today - timedelta(days=filters['max_days']))
+        )
+
+    return queryset
+
+
+def filter_acts(queryset, filters):
+    """
+    Применяет к выборке актов приёмки фильтр клиента панели и период.
+
+    Args:
+        queryset (QuerySet): Выборка ReceptionAct
+        filters (dict): Результат get_equipment_filters() и get_period_filters()
+
+    Returns:
+        QuerySet: Отфильтрованная выборка
+    """
+    if 'client' in filters:
+        prefix = Client.normalize_search_text(filters['client'])
+        queryset = queryset.filter(
+            client__search_short_name__gte=prefix,
+            client__search_short_name__lt=prefix + chr(0x10FFFF),
+        )
+    return filter_period(queryset, filters)
+
+
+def get_period_filters(params):
+    """
+    Период (даты "с" и "по" включительно) из GET-параметров date_from и date_to.
+
+    Некорректные даты отбрасываются.
+
+    Args:
+        params (QueryDict): GET-параметры запроса
+
+    Returns:
+        dict: {'date_from': date, 'date_to': date} (только заданные и корректные)
+    """
+    filters = {}
+    for name in ('date_from', 'date_to'):
+        try:
+            day = parse_date(params.get(name) or '')
+        except ValueError:
+            day = None
+        if day is not None:
+            filters[name] = day
+    return filters
+
+
+def filter_period(queryset, filters, field='created_at'):
+    """
+    Ограничивает выборку периодом по полю времени (диапазон по индексу).
+
+    Args:
+        queryset (QuerySet): Выборка
+        filters (dict): Результат get_period_filters()
+        field (str): Поле времени
+
+    Returns:
+        QuerySet: Отфильтрованная выборка
+    """
+    if 'date_from' in filters:
+        queryset = queryset.filter(**{f'{field}__gte': _local_day_start(filters['date_from'])})
+    if 'date_to' in filters:
+        queryset = queryset.filter(**{f'{field}__lt': _local_day_start(filters['date_to'] + timedelta(days=1))})
+    return queryset
+
+
+def encode_cursor(moment, pk):
+    """
+    Курсор страницы: позиция последней показанной строки.
+
+    Args:
+        moment (datetime): Значение поля времени строки
+        pk (int): ID строки
+
+    Returns:
+        str: Курсор для GET-параметра
+    """
+    raw = json.dumps([moment.isoformat(), pk])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """
+    Позиция из курсора или None, если курсор не задан или повреждён.
+
+    Args:
+        cursor (str): Курсор из GET-параметра
+
+    Returns:
+        tuple: (datetime, int) или None
+    """
+    if not cursor:
+        return None
+    try:
+        moment, pk = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        moment = parse_datetime(moment)
+        pk = int(pk)
+    except (ValueError, TypeError):
+        return None
+    if moment is None:
+        return None
+    return moment, pk
+
+
+def paginate_keyset(queryset, cursor, page_size=DEFAULT_PAGE_SIZE, time_field='created_at', descending=False):
+    """
+    Одна страница выборки с keyset-пагинацией по (time_field, id).
+
+    Args:
+        queryset (QuerySet): Выборка (объекты или values())
+        cursor (str): Курсор предыдущей страницы или None для первой
+        page_size (int): Количество строк на странице
+        time_field (str): Поле времени для сортировки
+        descending (bool): Сортировка от новых к старым
+
+    Returns:
+        tuple: (list строк страницы, курсор следующей страницы или None)
+    """
+    if descending:
+        queryset = queryset.order_by(f'-{time_field}', '-id')
+        lookup = 'lt'
+    else:
+        queryset = queryset.order_by(time_field, 'id')
+        lookup = 'gt'
+
+    position = decode_cursor(cursor)
+    if position is not None:
+        moment, pk = position
+        queryset = queryset.filter(
+            Q(**{f'{time_field}__{lookup}': moment}) |
+            Q(**{time_field: moment, f'id__{lookup}': pk})
+        )
+
+    rows = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        if isinstance(last, dict):
+            next_cursor = encode_cursor(last[time_field], last['id'])
+        else:
+            next_cursor = encode_cursor(getattr(last, time_field), last.pk)
+
+    return rows, next_cursor
@@ -0,0 +1,34 @@
+"""
+Команда заполнения цеха (ReceivedEquipment.department) по категориям моделей.
+
+Нужна один раз после добавления поля department (для уже принятого
+оборудования). Новое оборудование получает цех автоматически, а смена
+цеха категории переносится сигналом (см. signals.py).
+
+Использование:
+    python manage.py backfill_equipment_department
+"""
+
+from django.core.management.base import BaseCommand
+
+from service_center.models import EquipmentCategory, EquipmentStatusCounter, ReceivedEquipment
+
+
+class Command(BaseCommand):
+    help = "Заполняет цех принятого оборудования по категориям моделей"
+
+    def handle(self, *args, **options):
+        updated = 0
+        # Один UPDATE на цех: меняются только записи с устаревшим значением
+        for department, _ in EquipmentCategory.DEPARTAMENT_CHOICES:
+            updated += ReceivedEquipment.objects.filter(
+                model__category__department=department
+            ).exclude(
+                department=department
+            ).update(department=department)
+
+        # Счётчики по цеху и статусу зависят от цеха
+        if updated:
+            EquipmentStatusCounter.rebuild()
+
+        self.stdout.write(self.style.SUCCESS(f"Обновлено записей оборудования: {updated}"))
@@ -0,0 +1,44 @@
+"""
+Команда создания начальных записей истории статусов оборудования.
+
+Нужна один раз после добавления таблицы EquipmentStatusTransition
+(для уже принятого оборудования). Прошлые переходы неизвестны, поэтому
+для каждого оборудования без истории добавляется одна запись: переход
+в текущий статус во время последнего изменения (updated_at).
+Время в статусах считается по переходам после этой записи.
+
+Использование:
+    python manage.py backfill_status_history
+"""
+
+from django.core.management.base import BaseCommand
+
+from service_center.models import EquipmentStatusTransition, ReceivedEquipment
+
+# Количество записей истории в одном INSERT
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = "Создаёт начальные записи истории статусов для оборудования без истории"
+
+    def handle(self, *args, **options):
+        equipment_rows = ReceivedEquipment.objects.filter(
+            status_history__isnull=True
+        ).order_by().values_list('id', 'status', 'updated_at')
+
+        created = 0
+        batch = []
+        for equipment_id, status, updated_at in equipment_rows.iterator(chunk_size=BATCH_SIZE):
+            batch.append(EquipmentStatusTransition(
+                equipment_id=equipment_id, from_status='', to_status=status, at=updated_at
+            ))
+            if len(batch) >= BATCH_SIZE:
+                EquipmentStatusTransition.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+        if batch:
+            EquipmentStatusTransition.objects.bulk_create(batch)
+            created += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Создано записей истории: {created}"))
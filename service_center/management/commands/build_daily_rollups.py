@@ -0,0 +1,65 @@
+"""
+Команда расчёта суточных итогов по оборудованию (DailyEquipmentRollup).
+
+Пересчитывает только дни, итоги которых могли измениться после начала
+прошлого завершённого расчёта (см. reports.changed_rollup_days()).
+Первый запуск и запуск с --full пересчитывают все дни. Удаление
+оборудования и перевод в другой цех учитываются инкрементальным расчётом;
+полный пересчёт нужен после правок в базе вручную, переноса модели в другую
+категорию того же цеха и смены клиента акта.
+
+Отметки удалённых дней (DailyRollupStaleDay), уже учтённые расчётом,
+удаляются.
+
+Рассчитан на запуск по расписанию (например, раз в час из cron).
+
+Использование:
+    python manage.py build_daily_rollups
+    python manage.py build_daily_rollups --full
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from service_center.models import DailyRollupRun, DailyRollupStaleDay
+from service_center.reports import all_rollup_days, changed_rollup_days, rebuild_daily_rollup
+
+# Запас по времени для изменений, сохранённых транзакциями, начатыми до прошлого расчёта
+CHANGES_OVERLAP = timedelta(minutes=5)
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает суточные итоги оборудования за изменившиеся дни"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help="Пересчитать все дни",
+        )
+
+    def handle(self, *args, **options):
+        started_at = timezone.now()
+        last_run = DailyRollupRun.objects.filter(finished_at__isnull=False).first()
+
+        full = options['full'] or last_run is None
+        if full:
+            days = all_rollup_days()
+        else:
+            days = sorted(changed_rollup_days(last_run.started_at - CHANGES_OVERLAP))
+
+        run = DailyRollupRun.objects.create(started_at=started_at, full=full)
+        rows = 0
+        for day in days:
+            rows += rebuild_daily_rollup(day)
+
+        # Отметки до начала этого расчёта учтены (с запасом на незавершённые транзакции)
+        DailyRollupStaleDay.objects.filter(marked_at__lt=started_at - CHANGES_OVERLAP).delete()
+
+        run.days = len(days)
+        run.finished_at = timezone.now()
+        run.save(update_fields=['days', 'finished_at'])
+
+        self.stdout.write(self.style.SUCCESS(f"Пересчитано дней: {len(days)}, строк итогов: {rows}"))
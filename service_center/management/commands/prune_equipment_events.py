@@ -0,0 +1,30 @@
+"""
+Команда удаления старых записей журнала изменений оборудования.
+
+Журнал нужен только для живого обновления открытых панелей и для
+переподключения потока событий, поэтому хранить его долго не нужно.
+Запускается по расписанию (например, раз в сутки из cron).
+
+Использование:
+    python manage.py prune_equipment_events --hours 24
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from service_center.models import EquipmentEvent
+
+
+class Command(BaseCommand):
+    help = "Удаляет старые записи журнала изменений оборудования"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=24,
+                            help="Сколько часов хранить записи журнала")
+
+    def handle(self, *args, **options):
+        border = timezone.now() - timedelta(hours=options['hours'])
+        deleted, _ = EquipmentEvent.objects.filter(created_at__lt=border).delete()
+        self.stdout.write(self.style.SUCCESS(f"Удалено записей журнала: {deleted}"))
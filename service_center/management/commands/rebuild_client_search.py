@@ -0,0 +1,42 @@
+"""
+Команда заполнения поисковых полей клиентов.
+
+Нужна один раз после добавления полей search_* (для уже существующих
+клиентов) и при изменении правил нормализации. Новые и изменённые
+клиенты получают поисковые поля автоматически в Client.save().
+
+Использование:
+    python manage.py rebuild_client_search
+"""
+
+from django.core.management.base import BaseCommand
+
+from service_center.models import Client
+
+
+class Command(BaseCommand):
+    help = "Заполняет нормализованные поисковые поля клиентов"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help="Количество клиентов в одном UPDATE")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        search_fields = list(Client.SEARCH_FIELDS.values())
+
+        batch = []
+        updated = 0
+        for client in Client.objects.order_by('pk').iterator(chunk_size=batch_size):
+            client.fill_search_fields()
+            batch.append(client)
+            if len(batch) >= batch_size:
+                Client.objects.bulk_update(batch, search_fields)
+                updated += len(batch)
+                batch = []
+
+        if batch:
+            Client.objects.bulk_update(batch, search_fields)
+            updated += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Обновлено клиентов: {updated}"))
@@ -0,0 +1,23 @@
+"""
+Команда полного пересчёта счётчиков оборудования по цеху и статусу.
+
+Нужна один раз после добавления таблицы счётчиков и после массовых
+изменений оборудования в обход ORM-сохранения (QuerySet.update(),
+правки в базе вручную). В остальных случаях счётчики обновляются
+автоматически.
+
+Использование:
+    python manage.py rebuild_equipment_counters
+"""
+
+from django.core.management.base import BaseCommand
+
+from service_center.models import EquipmentStatusCounter
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает счётчики оборудования по цеху и статусу"
+
+    def handle(self, *args, **options):
+        rows = EquipmentStatusCounter.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Строк счётчиков: {rows}"))
@@ -0,0 +1,47 @@
+"""
+Команда заполнения поисковых полей номеров принятого оборудования.
+
+Нужна один раз после добавления полей search_serial_number и
+search_inventory_number (для уже принятого оборудования) и при изменении
+правил нормализации. Новое и изменённое оборудование получает поисковые
+поля автоматически (ReceivedEquipment.save(), создание акта приёмки).
+
+Использование:
+    python manage.py rebuild_equipment_search
+"""
+
+from django.core.management.base import BaseCommand
+
+from service_center.models import ReceivedEquipment
+
+
+class Command(BaseCommand):
+    help = "Заполняет нормализованные поисковые поля номеров оборудования"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help="Количество оборудования в одном UPDATE")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        search_fields = list(ReceivedEquipment.NUMBER_SEARCH_FIELDS.values())
+
+        batch = []
+        updated = 0
+        # Читаются только номера: save() и сигналы не вызываются
+        equipment_list = ReceivedEquipment.objects.order_by('pk').only(
+            'pk', *ReceivedEquipment.NUMBER_SEARCH_FIELDS, *search_fields
+        )
+        for equipment in equipment_list.iterator(chunk_size=batch_size):
+            equipment.fill_search_fields()
+            batch.append(equipment)
+            if len(batch) >= batch_size:
+                ReceivedEquipment.objects.bulk_update(batch, search_fields)
+                updated += len(batch)
+                batch = []
+
+        if batch:
+            ReceivedEquipment.objects.bulk_update(batch, search_fields)
+            updated += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Обновлено оборудования: {updated}"))
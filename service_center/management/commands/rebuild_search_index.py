@@ -0,0 +1,26 @@
+"""
+Команда пересоздания индекса полнотекстового поиска.
+
+Создаёт таблицу FTS5 и триггеры, если их нет, и заполняет индекс по
+текущим оборудованию, актам и клиентам. Нужна один раз после развёртывания
+поиска и после изменений данных в обход триггеров (например, загрузки
+дампа в базу без индекса). Дальше индекс поддерживают триггеры.
+
+Использование:
+    python manage.py rebuild_search_index
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from service_center.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Пересоздаёт индекс полнотекстового поиска (SQLite FTS5)"
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("Полнотекстовый поиск доступен только для SQLite")
+        total = rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS(f"Строк в индексе поиска: {total}"))
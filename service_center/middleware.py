@@ -0,0 +1,40 @@
+"""
+Middleware приложения ServiceHub.
+"""
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.utils.functional import SimpleLazyObject
+
+from .roles import get_active_roles
+
+
+class ActiveRolesMiddleware:
+    """
+    Добавляет в запрос request.active_roles - набор названий активных ролей
+    пользователя.
+
+    Набор загружается лениво, не более одного раза за запрос (между запросами
+    не кэшируется, см. roles.py). Должен стоять после AuthenticationMiddleware.
+
+    Поддерживает и синхронные, и асинхронные представления, чтобы под ASGI
+    асинхронные представления (поток событий) не переводились в рабочий поток.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request.active_roles = SimpleLazyObject(lambda: get_active_roles(request.user))
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        # В асинхронных представлениях роли загружаются через sync_to_async
+        request.active_roles = SimpleLazyObject(lambda: get_active_roles(request.user))
+        return await self.get_response(request)
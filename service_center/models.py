@@ -10,8 +10,12 @@
 Все модели используют Django ORM для взаимодействия с базой данных SQLite.
 """
 
-from django.db import models
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import models, transaction
 from django.contrib.auth.models import User  # Стандартная модель пользователя Django
+from django.utils import timezone
 
 
 class Role(models.Model):
@@ -141,6 +145,26 @@ class Client(models.Model):
     # Дата и время создания записи о клиенте
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
 
+    # Нормализованные копии полей для поиска по префиксу (заполняются в save())
+    # Хранятся в нижнем регистре: SQLite не умеет сравнивать кириллицу без учёта регистра
+    search_short_name = models.CharField(max_length=50, blank=True, default='', editable=False,
+                                         db_index=True)
+    search_full_name = models.CharField(max_length=100, blank=True, default='', editable=False,
+                                        db_index=True)
+    search_contact_person = models.CharField(max_length=200, blank=True, default='', editable=False,
+                                             db_index=True)
+    # Только цифры телефона
+    search_phone = models.CharField(max_length=20, blank=True, default='', editable=False,
+                                    db_index=True)
+
+    # Соответствие поисковых полей исходным
+    SEARCH_FIELDS = {
+        'short_name': 'search_short_name',
+        'full_name': 'search_full_name',
+        'contact_person': 'search_contact_person',
+        'phone': 'search_phone',
+    }
+
     def __str__(self):
         """
         Строковое представление объекта для отображения в админке и в логах.
@@ -150,6 +174,99 @@ class Client(models.Model):
         """
         return self.short_name
 
+    @staticmethod
+    def normalize_search_text(value):
+        """
+        Приводит текст к виду, в котором хранятся поисковые поля.
+
+        Нижний регистр, "ё" заменяется на "е", пробелы схлопываются.
+
+        Args:
+            value (str): Исходный текст
+
+        Returns:
+            str: Нормализованный текст
+        """
+        return ' '.join((value or '').casefold().replace('ё', 'е').split())
+
+    @staticmethod
+    def normalize_search_phone(value):
+        """
+        Оставляет в телефоне только цифры, без кода страны у российских номеров.
+
+        "+7 (900) 123-45-67" и "8 900 123-45-67" приводятся к "9001234567".
+
+        Args:
+            value (str): Исходный телефон
+
+        Returns:
+            str: Цифры телефона
+        """
+        digits = ''.join(ch for ch in (value or '') if ch.isdigit())
+        if len(digits) == 11 and digits[0] in '78':
+            digits = digits[1:]
+        return digits
+
+    def fill_search_fields(self):
+        """
+        Заполняет нормализованные поисковые поля из исходных.
+        """
+        self.search_short_name = self.normalize_search_text(self.short_name)
+        self.search_full_name = self.normalize_search_text(self.full_name)
+        self.search_contact_person = self.normalize_search_text(self.contact_person)[:200]
+        self.search_phone = self.normalize_search_phone(self.phone)
+
+    @classmethod
+    def search(cls, query, limit=10):
+        """
+        Поиск клиентов по началу наименования, ФИО ответственного лица или телефона.
+
+        Префикс ищется диапазоном [префикс, префикс + максимальный символ) по
+        нормализованным полям, поэтому каждое условие - проход по индексу,
+        а не сканирование таблицы через LIKE '%...%'.
+
+        Args:
+            query (str): Введённый текст
+            limit (int): Максимальное количество результатов
+
+        Returns:
+            QuerySet: Найденные клиенты, отсортированные по краткому наименованию
+        """
+        text = cls.normalize_search_text(query)
+        if not text:
+            return cls.objects.none()
+
+        condition = models.Q()
+        for field in ('search_short_name', 'search_full_name', 'search_contact_person'):
+            condition |= models.Q(**{f'{field}__gte': text, f'{field}__lt': text + chr(0x10FFFF)})
+
+        digits = cls.normalize_search_phone(query)
+        prefixes = {digits} if digits else set()
+        if len(digits) > 1 and digits[0] in '78':
+            # Номер может вводиться с кодом страны, который в поиске не хранится
+            prefixes.add(digits[1:])
+        for prefix in prefixes:
+            # ':' - следующий за '9' символ
+            condition |= models.Q(search_phone__gte=prefix, search_phone__lt=prefix + ':')
+
+        return cls.objects.filter(condition).order_by('short_name')[:limit]
+
+    def save(self, *args, **kwargs):
+        """
+        Сохранение клиента с обновлением поисковых полей.
+
+        При сохранении с update_fields обновляются и соответствующие поисковые поля.
+        """
+        self.fill_search_fields()
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {
+                self.SEARCH_FIELDS[field] for field in update_fields if field in self.SEARCH_FIELDS
+            }
+
+        super().save(*args, **kwargs)
+
     class Meta:
         """
         Метаданные модели для настройки отображения в админке и поведения.
@@ -168,6 +285,8 @@ class EquipmentCategory(models.Model):
     Attributes:
         name (CharField): Название категории (обязательное, уникальное)
         description (TextField): Описание категории (необязательное)
+        department (CharField): Цех, обслуживающий категорию
+        updated_at (DateTimeField): Дата и время последнего изменения (автоматически)
     """
     DEPARTAMENT_CHOICES = [
         ('NONE', 'Не определён'),
@@ -186,6 +305,9 @@ class EquipmentCategory(models.Model):
     department = models.CharField(max_length=10, choices=DEPARTAMENT_CHOICES, default='NONE',
                                   verbose_name="Цех обслуживания")
 
+    # Дата последнего изменения (для инкрементальной синхронизации каталога)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name="Дата обновления")
+
     def __str__(self):
         """
         Строковое представление объекта для отображения в админке и в логах.
@@ -214,6 +336,7 @@ class Brand(models.Model):
         name (CharField): Название бренда (обязательное, уникальное в пределах категории)
         category (ForeignKey): Категория оборудования
         description (TextField): Дополнительная информация о бренде (необязательное)
+        updated_at (DateTimeField): Дата и время последнего изменения (автоматически)
     """
 
     # Название бренда/производителя (например, "Bosch", "Resanta")
@@ -227,6 +350,9 @@ class Brand(models.Model):
     # Дополнительная информация о бренде (история, особенности и т.д.)
     description = models.TextField(blank=True, null=True, verbose_name="Дополнительные заметки")
 
+    # Дата последнего изменения (для инкрементальной синхронизации каталога)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name="Дата обновления")
+
     def __str__(self):
         """
         Строковое представление объекта для отображения в админке и в логах.
@@ -258,6 +384,7 @@ class EquipmentModel(models.Model):
         brand (ForeignKey): Бренд производителя
         name (CharField): Название модели
         description (TextField): Дополнительная информация о модели (необязательное)
+        updated_at (DateTimeField): Дата и время последнего изменения (автоматически)
     """
 
     # Категория оборудования (дублируется для удобства запросов)
@@ -274,6 +401,9 @@ class EquipmentModel(models.Model):
     # Технические характеристики, особенности модели
     description = models.TextField(blank=True, null=True, verbose_name="Дополнительные заметки")
 
+    # Дата последнего изменения (для инкрементальной синхронизации каталога)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name="Дата обновления")
+
     def __str__(self):
         """
         Строковое представление объекта для отображения в админке и в логах.
@@ -303,6 +433,48 @@ class EquipmentModel(models.Model):
         unique_together = ('name', 'brand')
 
 
+class CatalogDeletion(models.Model):
+    """
+    Запись об удалении элемента каталога (категории, бренда или модели).
+
+    Нужна для инкрементальной синхронизации каталога: клиент, получающий
+    изменения с момента последнего визита, должен узнать и об удалённых записях.
+
+    Attributes:
+        KIND_CHOICES: Виды элементов каталога
+        kind (CharField): Вид удалённого элемента
+        object_id (BigIntegerField): ID удалённого элемента
+        deleted_at (DateTimeField): Дата и время удаления (автоматически)
+    """
+
+    KIND_CHOICES = [
+        ('category', 'Категория'),
+        ('brand', 'Бренд'),
+        ('model', 'Модель'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, verbose_name="Вид записи")
+    object_id = models.BigIntegerField(verbose_name="ID записи")
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name="Дата удаления")
+
+    def __str__(self):
+        """
+        Строковое представление объекта для отображения в админке и в логах.
+
+        Returns:
+            str: Вид и ID удалённой записи
+        """
+        return f"{self.get_kind_display()} #{self.object_id}"
+
+    class Meta:
+        """
+        Метаданные модели для настройки отображения в админке и поведения.
+        """
+        ordering = ['deleted_at']
+        verbose_name = "Удалённая запись каталога"
+        verbose_name_plural = "Удалённые записи каталога"
+
+
 class ReceptionAct(models.Model):
     """
     Модель для актов приёмки оборудования.
@@ -358,6 +530,10 @@ class ReceptionAct(models.Model):
         ordering = ['-created_at']  # Сортировка по дате создания (новые сверху)
         verbose_name = "Акт приёмки"
         verbose_name_plural = "Акты приёмки"
+        indexes = [
+            # Акты за период (панель приёмщика, выгрузка)
+            models.Index(fields=['created_at']),
+        ]
 
     @staticmethod
     def generate_act_number():
@@ -384,6 +560,132 @@ class ReceptionAct(models.Model):
         return f"ACT-{date_str}-{random_str}"
 
 
+class ActNumberSequence(models.Model):
+    """
+    Счётчик порядковых номеров актов приёмки в пределах года.
+
+    Одна строка на год. Значение увеличивается атомарным UPDATE внутри
+    транзакции создания акта, поэтому номер выдаётся за постоянное время
+    и два приёмщика не могут получить одинаковый номер.
+
+    Attributes:
+        year (PositiveIntegerField): Год, к которому относится счётчик
+        last_value (PositiveIntegerField): Последний выданный порядковый номер
+    """
+
+    # Год нумерации (нумерация актов начинается заново каждый год)
+    year = models.PositiveIntegerField(unique=True, verbose_name="Год")
+
+    # Последний выданный порядковый номер акта в этом году
+    last_value = models.PositiveIntegerField(default=0, verbose_name="Последний номер")
+
+    # Время жизни в кэше начального значения для peek() до выдачи первого номера года (5 минут)
+    INITIAL_VALUE_CACHE_TIMEOUT = 60 * 5
+
+    def __str__(self):
+        """
+        Строковое представление объекта для отображения в админке и в логах.
+
+        Returns:
+            str: Год и последний выданный номер
+        """
+        return f"{self.year}: {self.last_value}"
+
+    class Meta:
+        """
+        Метаданные модели для настройки отображения в админке и поведения.
+        """
+        verbose_name = "Счётчик номеров актов"
+        verbose_name_plural = "Счётчики номеров актов"
+
+    @classmethod
+    def _initial_value(cls, year):
+        """
+        Начальное значение нового счётчика года: максимальный порядковый номер
+        среди уже существующих актов этого года (одна агрегирующая выборка),
+        чтобы не выдать повторно номера, присвоенные до появления счётчика.
+
+        Args:
+            year (int): Год нумерации
+
+        Returns:
+            int: Последний использованный порядковый номер (0 - актов нет)
+        """
+        from django.db.models import IntegerField, Max
+        from django.db.models.functions import Cast, Substr
+
+        # Номер акта имеет формат DDMMYYYY-XXXX, порядковый номер начинается с 10-го символа
+        return ReceptionAct.objects.filter(
+            created_at__year=year,
+            act_number__regex=r'^[0-9]{8}-[0-9]+$'
+        ).aggregate(
+            max_serial=Max(Cast(Substr('act_number', 10), IntegerField()))
+        )['max_serial'] or 0
+
+    @classmethod
+    def _get_or_create_for_year(cls, year):
+        """
+        Возвращает счётчик года, создавая его при первом обращении.
+
+        Args:
+            year (int): Год нумерации
+
+        Returns:
+            ActNumberSequence: Счётчик указанного года
+        """
+        sequence = cls.objects.filter(year=year).first()
+        if sequence is not None:
+            return sequence
+
+        sequence, _ = cls.objects.get_or_create(year=year, defaults={'last_value': cls._initial_value(year)})
+        return sequence
+
+    @classmethod
+    def peek(cls, year):
+        """
+        Номер, который получит следующий акт года (без резервирования).
+
+        Используется только для отображения на форме: фактический номер
+        выдаётся методом next_value() при сохранении акта. Только чтение -
+        счётчик года создаётся при выдаче первого номера. Пока счётчика нет,
+        начальное значение берётся из кэша, чтобы каждое открытие формы
+        не выполняло выборку по актам года.
+
+        Args:
+            year (int): Год нумерации
+
+        Returns:
+            int: Предполагаемый следующий порядковый номер
+        """
+        last_value = cls.objects.filter(year=year).values_list('last_value', flat=True).first()
+        if last_value is None:
+            last_value = cache.get_or_set(
+                f'act_number:initial:{year}', lambda: cls._initial_value(year), cls.INITIAL_VALUE_CACHE_TIMEOUT
+            )
+        return last_value + 1
+
+    @classmethod
+    def next_value(cls, year):
+        """
+        Атомарно выдаёт следующий порядковый номер акта.
+
+        Должен вызываться внутри transaction.atomic(): UPDATE блокирует строку
+        счётчика до конца транзакции, поэтому параллельные сохранения актов
+        получают номера строго по очереди.
+
+        Args:
+            year (int): Год нумерации
+
+        Returns:
+            int: Выданный порядковый номер
+        """
+        from django.db.models import F
+
+        cls._get_or_create_for_year(year)
+        cls.objects.filter(year=year).update(last_value=F('last_value') + 1)
+        return cls.objects.filter(year=year).values_list('last_value', flat=True).get()
+
+
 class ReceivedEquipment(models.Model):
     """
     Модель для принятого оборудования.
@@ -393,10 +695,15 @@ class ReceivedEquipment(models.Model):
     Attributes:
         GUARANTEE_CHOICES: Варианты типов гарантии для оборудования
         STATUS_CHOICES: Варианты статусов оборудования в процессе ремонта
+        STATUS_COLORS, GUARANTEE_COLORS: Цвета статусов и типов гарантии (Bootstrap)
+        PRIORITY_CHOICES, PRIORITY_COLORS: Приоритеты координатора и их цвета
         reception_act (ForeignKey): Акт приёмки
         model (ForeignKey): Модель оборудования
+        version (PositiveIntegerField): Версия записи (для обнаружения одновременных изменений)
+        department (CharField): Цех категории модели (копия для выборок без JOIN)
         serial_number (CharField): Серийный номер (необязательное)
         inventory_number (CharField): Инвентарный номер клиента (необязательное)
+        search_serial_number, search_inventory_number (CharField): Нормализованные номера для поиска
         defect_description (TextField): Описание неисправности со слов клиента
         guarantee_type (CharField): Тип гарантии для этого оборудования
         assigned_specialist (ForeignKey): Назначенный специалист для ремонта
@@ -427,6 +734,44 @@ class ReceivedEquipment(models.Model):
         ('ISSUED', 'Выдано'),
     ]
 
+    # Цвета статусов для отображения в интерфейсе (классы Bootstrap)
+    STATUS_COLORS = {
+        'WAITING': 'primary',  # Серый primary
+        'ASSIGNED': 'info',  # Синий
+        'DIAGNOSIS': 'warning',  # Жёлтый
+        'DIAGNOSED': 'secondary',  # Темно-синий secondary
+        'APPROVAL': 'warning',  # Жёлтый
+        'PARTS': 'danger',  # Красный
+        'REPAIR': 'info',  # Синий
+        'TESTING': 'success',  # Зелёный
+        'READY': 'success',  # Зелёный
+        'ISSUED': 'dark',  # Тёмный
+    }
+
+    # Цвета типов гарантии для отображения в интерфейсе (классы Bootstrap)
+    GUARANTEE_COLORS = {
+        'NONE': 'primary',  # Серый
+        'SERVICE': 'warning',  # Жёлтый
+        'FACTORY': 'danger',  # Красный
+    }
+
+    # Значения приоритета, которые выставляет координатор, и их цвета
+    PRIORITY_CHOICES = [
+        (0, 'По очереди'),
+        (1, 'Срочно'),
+        (3, 'Стоп'),
+    ]
+    PRIORITY_COLORS = {
+        0: 'success',
+        1: 'danger',
+        3: 'secondary',
+    }
+
+    class VersionConflict(Exception):
+        """
+        Запись изменена другим пользователем после загрузки.
+        """
+
     # Акт приёмки, к которому относится оборудование
     # on_delete=models.CASCADE: при удалении акта удаляется всё его оборудование
     reception_act = models.ForeignKey(ReceptionAct, on_delete=models.CASCADE,
@@ -446,6 +791,22 @@ class ReceivedEquipment(models.Model):
     inventory_number = models.CharField(max_length=30, default="---", blank=True, null=True,
                                         verbose_name="Инвентарный номер")
 
+    # Нормализованные копии номеров для поиска по индексу (см. normalize_number(),
+    # заполняются в save()); для "номер не указан" - пустая строка
+    search_serial_number = models.CharField(max_length=30, blank=True, default='', editable=False,
+                                            db_index=True)
+    search_inventory_number = models.CharField(max_length=30, blank=True, default='', editable=False,
+                                               db_index=True)
+
+    # Соответствие поисковых полей исходным
+    NUMBER_SEARCH_FIELDS = {
+        'serial_number': 'search_serial_number',
+        'inventory_number': 'search_inventory_number',
+    }
+
+    # Значения номеров "не указан" (после нормализации), которые не участвуют в поиске
+    EMPTY_NUMBERS = {'', 'безномера'}
+
     # Описание проблемы/неисправности со слов клиента
     defect_description = models.CharField(max_length=300, blank=True, null=True,
                                           verbose_name="Описание неисправности")
@@ -464,6 +825,15 @@ class ReceivedEquipment(models.Model):
         related_name='assigned_equipment'  # Имя для обратной связи
     )
 
+    # Версия записи: увеличивается при каждом сохранении, используется
+    # для обнаружения одновременных изменений (см. save(expected_version=...))
+    version = models.PositiveIntegerField(default=1, editable=False, verbose_name="Версия")
+
+    # Цех, обслуживающий категорию модели. Копия EquipmentCategory.department:
+    # заполняется в save(), при смене цеха категории обновляется сигналом
+    department = models.CharField(max_length=10, choices=EquipmentCategory.DEPARTAMENT_CHOICES,
+                                  default='NONE', editable=False, verbose_name="Цех")
+
     # Текущий статус оборудования в процессе ремонта
     status = models.CharField(max_length=20, choices=STATUS_CHOICES,
                               default='WAITING', verbose_name="Статус")
@@ -505,25 +875,156 @@ class ReceivedEquipment(models.Model):
         """
         return f"{self.model.category.name} {self.model.brand.name} {self.model.name}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Значения на момент загрузки: модель (при её смене цех определяется заново),
+        # цех и статус (для счётчиков EquipmentStatusCounter)
+        instance._loaded_model_id = instance.__dict__.get('model_id')
+        instance._loaded_counter_key = (instance.__dict__.get('department'), instance.__dict__.get('status'))
+        return instance
+
+    def save(self, *args, expected_version=None, **kwargs):
+        """
+        Сохранение оборудования с заполнением цеха по категории модели,
+        увеличением версии записи и обновлением счётчиков по цеху и статусу.
+
+        Цех определяется для новых записей и при смене модели,
+        в остальных случаях лишних запросов к категории нет.
+        Поисковые поля номеров обновляются вместе с номерами.
+        Счётчики и история статусов меняются в той же транзакции, что и сама запись.
+
+        Args:
+            expected_version (int): Версия, которую видел пользователь. Если задана,
+                запись сохраняется только при совпадении версии в базе
+                (UPDATE ... WHERE version = n), иначе - VersionConflict
+
+        Raises:
+            ReceivedEquipment.VersionConflict: Запись изменена после загрузки
+        """
+        adding = self._state.adding
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and not update_fields:
+            # Как и Django, пустой update_fields ничего не сохраняет
+            return
+
+        self.fill_search_fields()
+        if update_fields is not None:
+            update_fields = kwargs['update_fields'] = set(update_fields) | {
+                self.NUMBER_SEARCH_FIELDS[field] for field in update_fields if field in self.NUMBER_SEARCH_FIELDS
+            }
+
+        if adding or self.model_id != getattr(self, '_loaded_model_id', None):
+            self.department = self.model.category.department
+            self._loaded_model_id = self.model_id
+
+            if update_fields is not None:
+                update_fields = kwargs['update_fields'] = set(update_fields) | {'department'}
+
+        old_key = None if adding else getattr(self, '_loaded_counter_key', None)
+        new_key = (self.department, self.status)
+        if old_key is not None and update_fields is not None:
+            # Несохраняемые поля в базе не меняются
+            new_key = (
+                self.department if 'department' in update_fields else old_key[0],
+                self.status if 'status' in update_fields else old_key[1],
+            )
+
+        with transaction.atomic():
+            if not adding:
+                if expected_version is not None:
+                    # Условное увеличение версии блокирует строку до конца транзакции
+                    if not type(self).objects.filter(pk=self.pk, version=expected_version).update(
+                        version=expected_version + 1
+                    ):
+                        raise self.VersionConflict(f"Оборудование #{self.pk} изменено другим пользователем")
+                    self.version = expected_version + 1
+                else:
+                    # Без проверки версии - следующая после текущей версии в базе
+                    current = type(self).objects.select_for_update().filter(
+                        pk=self.pk
+                    ).values_list('version', flat=True).first()
+                    if current is not None:
+                        self.version = current + 1
+
+                if update_fields is not None:
+                    kwargs['update_fields'] = set(update_fields) | {'version', 'updated_at'}
+
+            super().save(*args, **kwargs)
+
+            if old_key != new_key:
+                changes = Counter({new_key: 1})
+                if old_key is not None:
+                    changes[old_key] -= 1
+                EquipmentStatusCounter.apply(changes)
+
+            if adding or (old_key is not None and old_key[1] != new_key[1]):
+                EquipmentStatusTransition.record(
+                    [(self.pk, old_key[1] if old_key else '', new_key[1])], at=self.updated_at
+                )
+
+        self._loaded_counter_key = new_key
+
+    @classmethod
+    def normalize_number(cls, value):
+        """
+        Приводит серийный или инвентарный номер к виду, в котором хранятся
+        поисковые поля.
+
+        Нижний регистр, без пробелов и дефисов: "SN 12-34" и "sn1234" совпадают.
+        Значения "---" и "Без номера" дают пустую строку.
+
+        Args:
+            value (str): Исходный номер
+
+        Returns:
+            str: Нормализованный номер
+        """
+        number = ''.join(ch for ch in (value or '').casefold() if not ch.isspace() and ch not in '-‐–—')
+        return '' if number in cls.EMPTY_NUMBERS else number
+
+    def fill_search_fields(self):
+        """
+        Заполняет нормализованные поисковые поля номеров из исходных.
+        """
+        self.search_serial_number = self.normalize_number(self.serial_number)
+        self.search_inventory_number = self.normalize_number(self.inventory_number)
+
+    @classmethod
+    def find_by_numbers(cls, serial_number='', inventory_number='', limit=10):
+        """
+        Ранее принятое оборудование с тем же серийным или инвентарным номером.
+
+        Номера сравниваются на равенство по нормализованным полям, поэтому
+        каждое условие - точечный поиск по индексу. Номера "не указан"
+        не ищутся.
+
+        Args:
+            serial_number (str): Серийный номер
+            inventory_number (str): Инвентарный номер
+            limit (int): Максимальное количество результатов
+
+        Returns:
+            QuerySet: Найденное оборудование, новые сверху
+        """
+        condition = models.Q()
+        serial = cls.normalize_number(serial_number)
+        if serial:
+            condition |= models.Q(search_serial_number=serial)
+        inventory = cls.normalize_number(inventory_number)
+        if inventory:
+            condition |= models.Q(search_inventory_number=inventory)
+        if not condition:
+            return cls.objects.none()
+        return cls.objects.filter(condition).order_by('-created_at')[:limit]
+
     def get_status_color(self):
         """
         Определяет цвет статуса для отображения в интерфейсе (Bootstrap).
         Каждый статус имеет свой цвет для визуального различия.
         Returns:  str: Название класса цвета Bootstrap
         """
-        colors = {
-            'WAITING': 'primary',  # Серый primary
-            'ASSIGNED': 'info',  # Синий
-            'DIAGNOSIS': 'warning',  # Жёлтый
-            'DIAGNOSED': 'secondary',  # Темно-синий secondary
-            'APPROVAL': 'warning',  # Жёлтый
-            'PARTS': 'danger',  # Красный
-            'REPAIR': 'info',  # Синий
-            'TESTING': 'success',  # Зелёный
-            'READY': 'success',  # Зелёный
-            'ISSUED': 'dark',  # Тёмный
-        }
-        return colors.get(self.status, 'secondary')
+        return self.STATUS_COLORS.get(self.status, 'secondary')
 
     def get_guarantee_color(self):
         """
@@ -531,12 +1032,7 @@ class ReceivedEquipment(models.Model):
         Каждая гарантия имеет свой цвет для визуального различия.
         Returns:  str: Название класса цвета Bootstrap
         """
-        colors = {
-            'NONE': 'primary',  # Серый
-            'SERVICE': 'warning',  # Жёлтый
-            'FACTORY': 'danger',  # Красный
-            }
-        return colors.get(self.guarantee_type, 'secondary')
+        return self.GUARANTEE_COLORS.get(self.guarantee_type, 'secondary')
 
     class Meta:
         """
@@ -546,6 +1042,433 @@ class ReceivedEquipment(models.Model):
         ordering = ['-priority', '-created_at']
         verbose_name = "Принятое оборудование"
         verbose_name_plural = "Принятое оборудование"
+        indexes = [
+            # Выборки по статусу в порядке поступления (панели координатора, электронщика, приёмщика)
+            models.Index(fields=['status', 'created_at', 'id']),
+            # Панели цехов: цех + статус в порядке поступления
+            models.Index(fields=['department', 'status', 'created_at']),
+            # Сортировка по умолчанию (ordering)
+            models.Index(fields=['-priority', '-created_at']),
+            # Панель координатора без фильтра статуса: всё, кроме выданного
+            models.Index(
+                fields=['created_at', 'id'],
+                condition=~models.Q(status='ISSUED'),
+                name='receivedequip_open_idx',
+            ),
+            # Рабочие вкладки панели электронщика
+            models.Index(
+                fields=['created_at'],
+                condition=models.Q(status__in=['WAITING', 'DIAGNOSIS', 'REPAIR']),
+                name='receivedequip_active_idx',
+            ),
+            # Архив панели электронщика: цех + постраничная выборка по (updated_at, id),
+            # LIMIT страницы останавливает чтение индекса без сортировки
+            models.Index(fields=['department', 'updated_at', 'id'], name='receivedequip_archive_idx'),
+            # Суточные итоги: принятое за день и изменённое после прошлого расчёта
+            models.Index(fields=['created_at']),
+            models.Index(fields=['updated_at']),
+        ]
+
+
+class EquipmentStatusCounter(models.Model):
+    """
+    Количество принятого оборудования по цеху и статусу.
+
+    Материализованный итог GROUP BY по ReceivedEquipment для заголовков
+    панелей. Обновляется в транзакции изменения оборудования
+    (ReceivedEquipment.save(), удаление - см. signals.py, массовое создание
+    в create_reception_act). Полный пересчёт - команда rebuild_equipment_counters.
+
+    Attributes:
+        department (CharField): Цех
+        status (CharField): Статус оборудования
+        count (IntegerField): Количество оборудования
+    """
+
+    # Цех (как в EquipmentCategory.department)
+    department = models.CharField(max_length=10, choices=EquipmentCategory.DEPARTAMENT_CHOICES,
+                                  verbose_name="Цех")
+
+    # Статус оборудования (как в ReceivedEquipment.status)
+    status = models.CharField(max_length=20, choices=ReceivedEquipment.STATUS_CHOICES,
+                              verbose_name="Статус")
+
+    # Количество оборудования цеха в этом статусе
+    count = models.IntegerField(default=0, verbose_name="Количество")
+
+    def __str__(self):
+        """
+        Строковое представление объекта для отображения в админке и в логах.
+
+        Returns:
+            str: Цех, статус и количество
+        """
+        return f"{self.get_department_display()} / {self.get_status_display()}: {self.count}"
+
+    class Meta:
+        """
+        Метаданные модели для настройки отображения в админке и поведения.
+        """
+        unique_together = ['department', 'status']
+        verbose_name = "Счётчик оборудования"
+        verbose_name_plural = "Счётчики оборудования"
+
+    @classmethod
+    def apply(cls, changes):
+        """
+        Изменяет счётчики атомарными UPDATE.
+
+        Args:
+            changes (dict): {(цех, статус): изменение количества}
+        """
+        with transaction.atomic():
+            for (department, status), delta in changes.items():
+                if not delta:
+                    continue
+                counter, _ = cls.objects.get_or_create(department=department, status=status)
+                cls.objects.filter(pk=counter.pk).update(count=models.F('count') + delta)
+
+    @classmethod
+    def rebuild(cls):
+        """
+        Пересчитывает все счётчики по таблице оборудования (одна группирующая выборка).
+
+        Returns:
+            int: Количество строк счётчиков
+        """
+        with transaction.atomic():
+            totals = ReceivedEquipment.objects.order_by().values(
+                'department', 'status'
+            ).annotate(total=models.Count('id'))
+            counters = [
+                cls(department=row['department'], status=row['status'], count=row['total'])
+                for row in totals
+            ]
+            cls.objects.all().delete()
+            cls.objects.bulk_create(counters)
+        return len(counters)
+
+    @classmethod
+    def as_dict(cls):
+        """
+        Ненулевые счётчики в виде {цех: {статус: количество}}.
+        """
+        result = {}
+        for department, status, count in cls.objects.filter(count__gt=0).values_list(
+            'department', 'status', 'count'
+        ):
+            result.setdefault(department, {})[status] = count
+        return result
+
+
+class EquipmentEvent(models.Model):
+    """
+    Журнал изменений принятого оборудования для живого обновления панелей.
+
+    Каждое сохранение или удаление оборудования добавляет запись с текущими
+    значениями статуса, приоритета и гарантии. Поток событий (SSE) отдаёт
+    записи по возрастанию id, который служит и идентификатором события
+    (Last-Event-ID при переподключении). Старые записи удаляет команда
+    prune_equipment_events.
+
+    Attributes:
+        KIND_CHOICES: Виды изменений
+        equipment_id (BigIntegerField): ID оборудования
+        kind (CharField): Вид изменения
+        payload (JSONField): Значения полей оборудования после изменения
+        created_at (DateTimeField): Дата и время изменения (автоматически)
+    """
+
+    KIND_CHOICES = [
+        ('created', 'Принято'),
+        ('updated', 'Изменено'),
+        ('deleted', 'Удалено'),
+    ]
+
+    # ID оборудования (без внешнего ключа: запись переживает удаление оборудования)
+    equipment_id = models.BigIntegerField(verbose_name="ID оборудования")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, verbose_name="Вид изменения")
+    payload = models.JSONField(verbose_name="Данные")
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name="Дата изменения")
+
+    def __str__(self):
+        """
+        Строковое представление объекта для отображения в админке и в логах.
+
+        Returns:
+            str: Вид изменения и ID оборудования
+        """
+        return f"{self.get_kind_display()} #{self.equipment_id}"
+
+    class Meta:
+        """
+        Метаданные модели для настройки отображения в админке и поведения.
+        """
+        ordering = ['id']
+        verbose_name = "Изменение оборудования"
+        verbose_name_plural = "Изменения оборудования"
+
+    @staticmethod
+    def snapshot(equipment):
+        """
+        Поля оборудования, которые панели обновляют на месте.
+
+        Args:
+            equipment (ReceivedEquipment): Оборудование
+
+        Returns:
+            dict: Данные события
+        """
+        return {
+            'id': equipment.pk,
+            'act_id': equipment.reception_act_id,
+            'department': equipment.department,
+            'status': equipment.status,
+            'status_display': equipment.get_status_display(),
+            'status_color': equipment.get_status_color(),
+            'priority': equipment.priority,
+            'guarantee': equipment.guarantee_type,
+            'version': equipment.version,
+        }
+
+    @classmethod
+    def record(cls, equipment_list, kind, **extra):
+        """
+        Добавляет в журнал события для списка оборудования одним запросом.
+
+        Args:
+            equipment_list (list): Оборудование (ReceivedEquipment)
+            kind (str): Вид изменения из KIND_CHOICES
+            **extra: Дополнительные данные события (например, previous_department)
+        """
+        cls.objects.bulk_create([
+            cls(equipment_id=equipment.pk, kind=kind, payload={**cls.snapshot(equipment), **extra})
+            for equipment in equipment_list
+        ])
+
+
+class EquipmentStatusTransition(models.Model):
+    """
+    История статусов принятого оборудования (только добавление записей).
+
+    Каждая смена статуса добавляет запись "из какого статуса, в какой, когда".
+    Время пребывания в статусе - от перехода в него до следующего перехода
+    того же оборудования (см. reports.status_duration_percentiles()).
+    Записи добавляют ReceivedEquipment.save(), массовое изменение
+    и создание акта приёмки; для уже принятого оборудования начальные записи
+    создаёт команда backfill_status_history.
+
+    Attributes:
+        equipment (ForeignKey): Оборудование
+        from_status (CharField): Предыдущий статус (пусто для первой записи)
+        to_status (CharField): Новый статус
+        at (DateTimeField): Дата и время перехода
+    """
+
+    equipment = models.ForeignKey(
+        ReceivedEquipment,
+        on_delete=models.CASCADE,
+        related_name='status_history',
+        verbose_name="Оборудование"
+    )
+    from_status = models.CharField(max_length=20, choices=ReceivedEquipment.STATUS_CHOICES, blank=True,
+                                   verbose_name="Предыдущий статус")
+    to_status = models.CharField(max_length=20, choices=ReceivedEquipment.STATUS_CHOICES,
+                                 verbose_name="Новый статус")
+    at = models.DateTimeField(default=timezone.now, verbose_name="Дата перехода")
+
+    def __str__(self):
+        """
+        Строковое представление объекта для отображения в админке и в логах.
+
+        Returns:
+            str: ID оборудования и переход
+        """
+        return f"#{self.equipment_id}: {self.from_status or '—'} → {self.to_status}"
+
+    def save(self, *args, **kwargs):
+        """
+        Сохраняет только новые записи: история не изменяется.
+        """
+        if not self._state.adding:
+            raise ValueError("Записи истории статусов не изменяются")
+        super().save(*args, **kwargs)
+
+    class Meta:
+        """
+        Метаданные модели для настройки отображения в админке и поведения.
+        """
+        ordering = ['at', 'id']
+        verbose_name = "Переход статуса"
+        verbose_name_plural = "История статусов"
+        indexes = [
+            # История одного оборудования и расчёт времени в статусе (LEAD по оборудованию)
+            models.Index(fields=['equipment', 'at'], name='statustrans_equipment_at_idx'),
+            # Переходы в статус за период (отчёты по статусам)
+            models.Index(fields=['to_status', 'at'], name='statustrans_status_at_idx'),
+        ]
+
+    @classmethod
+    def record(cls, transitions, at=None):
+        """
+        Добавляет переходы статусов одним запросом.
+
+        Args:
+            transitions (list): Кортежи (ID оборудования, предыдущий статус или '', новый статус)
+            at (datetime): Время перехода (по умолчанию - текущее)
+        """
+        at = at or timezone.now()
+        cls.objects.bulk_create([
+            cls(equipment_id=equipment_id, from_status=from_status, to_status=to_status, at=at)
+            for equipment_id, from_status, to_status in transitions
+        ])
+
+
+class DailyEquipmentRollup(models.Model):
+    """
+    Суточные итоги по оборудованию для отчётов руководителя.
+
+    Одна строка на день, цех, категорию, клиента и тип гарантии. Строится
+    командой build_daily_rollups (только по изменившимся дням), отчёт
+    читает только эту таблицу.
+
+    Принятое считается по дате приёмки, выданное - по дате перехода
+    в статус ISSUED (история статусов). Срок ремонта и стоимость относятся
+    к выданному за день оборудованию.
+
+    Attributes:
+        day (DateField): День
+        department (CharField): Цех
+        category (ForeignKey): Категория оборудования
+        client (ForeignKey): Клиент
+        guarantee_type (CharField): Тип гарантии
+        received (PositiveIntegerField): Принято единиц
+        issued (PositiveIntegerField): Выдано единиц
+        repair_days_median (FloatField): Медиана срока ремонта выданного (дней)
+        repair_days_p90 (FloatField): 90-й процентиль срока ремонта выданного (дней)
+        repair_days_histogram (JSONField): {дней в ремонте: единиц} - для процентилей за период
+        estimated_cost_total (DecimalField): Сумма примерной стоимости ремонта выданного
+    """
+
+    day = models.DateField(verbose_name="День")
+    department = models.CharField(max_length=10, choices=EquipmentCategory.DEPARTAMENT_CHOICES,
+                                  verbose_name="Цех")
+    category = models.ForeignKey(
+        EquipmentCategory,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='+',
+        verbose_name="Категория"
+    )
+    client = models.ForeignKey(
+        Client,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='+',
+        verbose_name="Клиент"
+    )
+    guarantee_type = models.CharField(max_length=20, choices=ReceivedEquipment.GUARANTEE_CHOICES,
+                                      verbose_name="Тип гарантии")
+    received = models.PositiveIntegerField(default=0, verbose_name="Принято")
+    issued = models.PositiveIntegerField(default=0, verbose_name="Выдано")
+    repair_days_median = models.FloatField(null=True, blank=True, verbose_name="Медиана срока ремонта")
+    repair_days_p90 = models.FloatField(null=True, blank=True, verbose_name="P90 срока ремонта")
+    repair_days_histogram = models.JSONField(default=dict, verbose_name="Распределение срока ремонта")
+    estimated_cost_total = models.DecimalField(max_digits=14, decimal_places=2, default=0,
+                                               verbose_name="Сумма примерной стоимости")
+
+    def __str__(self):
+        """
+        Строковое представление объекта для отображения в админке и в логах.
+
+        Returns:
+            str: День, цех и количество
+        """
+        return f"{self.day} {self.get_department_display()}: +{self.received} / -{self.issued}"
+
+    class Meta:
+        """
+        Метаданные модели для настройки отображения в админке и поведения.
+        """
+        ordering = ['day']
+        verbose_name = "Суточные итоги"
+        verbose_name_plural = "Суточные итоги"
+        unique_together = ['day', 'department', 'category', 'client', 'guarantee_type']
+        indexes = [
+            # Отчёт за период по всем цехам и по одному цеху
+            models.Index(fields=['day']),
+            models.Index(fields=['department', 'day']),
+        ]
+
+
+class DailyRollupRun(models.Model):
+    """
+    Запуск расчёта суточных итогов.
+
+    Время начала последнего завершённого запуска - граница, после которой
+    изменения оборудования пересчитываются следующим запуском.
+
+    Attributes:
+        started_at (DateTimeField): Начало расчёта
+        finished_at (DateTimeField): Окончание расчёта (пусто, если не завершён)
+        days (PositiveIntegerField): Пересчитано дней
+        full (BooleanField): Полный пересчёт
+    """
+
+    started_at = models.DateTimeField(verbose_name="Начало")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Окончание")
+    days = models.PositiveIntegerField(default=0, verbose_name="Дней")
+    full = models.BooleanField(default=False, verbose_name="Полный пересчёт")
+
+    def __str__(self):
+        """
+        Строковое представление объекта для отображения в админке и в логах.
+
+        Returns:
+            str: Время начала и количество дней
+        """
+        return f"{self.started_at:%d.%m.%Y %H:%M}: {self.days} дн."
+
+    class Meta:
+        """
+        Метаданные модели для настройки отображения в админке и поведения.
+        """
+        ordering = ['-started_at']
+        verbose_name = "Расчёт суточных итогов"
+        verbose_name_plural = "Расчёты суточных итогов"
+
+
+class DailyRollupStaleDay(models.Model):
+    """
+    День, суточные итоги которого устарели из-за удаления оборудования.
+
+    Удалённое оборудование не оставляет строк с updated_at, по которым
+    расчёт находит изменившиеся дни, поэтому дни приёмки и выдачи
+    удаляемого оборудования отмечаются здесь (см. signals.py).
+
+    Attributes:
+        day (DateField): День суточных итогов
+        marked_at (DateTimeField): Время отметки
+    """
+
+    day = models.DateField(verbose_name="День")
+    marked_at = models.DateTimeField(default=timezone.now, db_index=True, verbose_name="Отмечен")
+
+    def __str__(self):
+        """
+        Строковое представление объекта для отображения в админке и в логах.
+
+        Returns:
+            str: День
+        """
+        return f"{self.day:%d.%m.%Y}"
+
+    class Meta:
+        """
+        Метаданные модели для настройки отображения в админке и поведения.
+        """
+        verbose_name = "Устаревший день итогов"
+        verbose_name_plural = "Устаревшие дни итогов"
 
 
 class SparePartCategory(models.Model):
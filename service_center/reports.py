@@ -0,0 +1,326 @@
+"""
+Отчёты по ремонту оборудования.
+
+Время в статусе считается по истории статусов (EquipmentStatusTransition):
+пребывание в статусе длится от перехода в него до следующего перехода
+того же оборудования. Следующий переход берётся оконной функцией LEAD
+в базе, поэтому таблица оборудования и журналы не просматриваются.
+
+Отчёт по срокам ремонта за период читает только суточные итоги
+(DailyEquipmentRollup), которые строит команда build_daily_rollups.
+"""
+
+from collections import Counter
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Sum, Window
+from django.db.models.functions import Lead, TruncDate
+from django.utils import timezone
+
+from .models import (
+    Client, DailyEquipmentRollup, DailyRollupStaleDay, EquipmentCategory, EquipmentStatusTransition,
+    ReceivedEquipment,
+)
+
+# Разрезы отчёта по срокам ремонта: поле суточных итогов -> название
+ROLLUP_GROUPS = {
+    'department': 'Цех',
+    'category': 'Категория',
+    'client': 'Клиент',
+    'guarantee_type': 'Тип гарантии',
+}
+
+# Процентили времени в статусе по умолчанию
+DEFAULT_PERCENTILES = (50, 90, 95)
+
+
+def _percentile(sorted_values, percent):
+    """
+    Процентиль с линейной интерполяцией между соседними значениями
+    (как PERCENTILE_CONT в SQL).
+
+    Args:
+        sorted_values (list): Отсортированные по возрастанию значения
+        percent (int): Процентиль (0-100)
+
+    Returns:
+        float: Значение процентиля
+    """
+    position = (len(sorted_values) - 1) * percent / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def status_stays(since=None, department=None):
+    """
+    Завершённые пребывания оборудования в статусах.
+
+    Args:
+        since (datetime): Учитывать переходы в статус не раньше этого времени
+        department (str): Цех оборудования (None - все цеха)
+
+    Returns:
+        QuerySet: Строки (статус, длительность timedelta)
+    """
+    transitions = EquipmentStatusTransition.objects.all()
+    if since is not None:
+        # Более поздние переходы остаются в выборке, поэтому LEAD видит выход из статуса
+        transitions = transitions.filter(at__gte=since)
+    if department is not None:
+        transitions = transitions.filter(equipment__department=department)
+
+    return transitions.annotate(
+        left_at=Window(
+            Lead('at'),
+            partition_by=[F('equipment_id')],
+            order_by=[F('at').asc(), F('id').asc()],
+        ),
+    ).annotate(
+        duration=ExpressionWrapper(F('left_at') - F('at'), output_field=DurationField()),
+    ).filter(
+        # Текущий статус оборудования ещё не завершён
+        left_at__isnull=False,
+    ).order_by().values_list('to_status', 'duration')
+
+
+def status_duration_percentiles(days=90, department=None, percentiles=DEFAULT_PERCENTILES):
+    """
+    Процентили времени пребывания оборудования в каждом статусе.
+
+    Args:
+        days (int): Период в днях (по времени перехода в статус)
+        department (str): Цех оборудования (None - все цеха)
+        percentiles (tuple): Нужные процентили
+
+    Returns:
+        list: По статусам из STATUS_CHOICES, где были завершённые пребывания:
+            {'status', 'status_display', 'count', 'percentiles': {процентиль: секунды}}
+    """
+    durations = {}
+    for status, duration in status_stays(timezone.now() - timedelta(days=days), department).iterator():
+        durations.setdefault(status, []).append(duration.total_seconds())
+
+    report = []
+    for status, status_display in ReceivedEquipment.STATUS_CHOICES:
+        values = sorted(durations.get(status, []))
+        if not values:
+            continue
+        report.append({
+            'status': status,
+            'status_display': status_display,
+            'count': len(values),
+            'percentiles': {percent: round(_percentile(values, percent)) for percent in percentiles},
+        })
+    return report
+
+
+def _histogram_percentile(histogram, percent):
+    """
+    Процентиль по распределению {значение: количество} с той же
+    интерполяцией, что и _percentile().
+
+    Args:
+        histogram (Counter): Распределение значений
+        percent (int): Процентиль (0-100)
+
+    Returns:
+        float: Значение процентиля или None для пустого распределения
+    """
+    total = sum(histogram.values())
+    if not total:
+        return None
+    position = (total - 1) * percent / 100
+    lower_index = int(position)
+    upper_index = min(lower_index + 1, total - 1)
+
+    lower = upper = None
+    seen = 0
+    for value in sorted(histogram):
+        seen += histogram[value]
+        if lower is None and seen > lower_index:
+            lower = value
+        if seen > upper_index:
+            upper = value
+            break
+    return lower + (upper - lower) * (position - lower_index)
+
+
+def _local_day_start(day):
+    """
+    Начало суток в текущем часовом поясе.
+    """
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def changed_rollup_days(since):
+    """
+    Дни, суточные итоги которых могли измениться после указанного времени.
+
+    Это дни приёмки и дни выдачи оборудования, изменённого после since
+    (смена статуса, гарантии, стоимости, перевод в другой цех и т. п.
+    меняет updated_at), дни выдачи, записанные в историю статусов после
+    since, и дни удалённого после since оборудования (DailyRollupStaleDay).
+
+    Args:
+        since (datetime): Время начала прошлого расчёта
+
+    Returns:
+        set: Даты (date)
+    """
+    changed = ReceivedEquipment.objects.filter(updated_at__gte=since)
+    days = set(
+        changed.annotate(day=TruncDate('created_at')).order_by().values_list('day', flat=True).distinct()
+    )
+    days.update(
+        EquipmentStatusTransition.objects.filter(
+            to_status='ISSUED', equipment__in=changed.values('id')
+        ).annotate(day=TruncDate('at')).order_by().values_list('day', flat=True).distinct()
+    )
+    days.update(
+        EquipmentStatusTransition.objects.filter(
+            to_status='ISSUED', at__gte=since
+        ).annotate(day=TruncDate('at')).order_by().values_list('day', flat=True).distinct()
+    )
+    days.update(
+        DailyRollupStaleDay.objects.filter(marked_at__gte=since).order_by().values_list('day', flat=True).distinct()
+    )
+    return days
+
+
+def all_rollup_days():
+    """
+    Все дни от первой приёмки оборудования до сегодняшнего (полный пересчёт).
+
+    Returns:
+        list: Даты (date)
+    """
+    first = ReceivedEquipment.objects.order_by('created_at').values_list('created_at', flat=True).first()
+    if first is None:
+        return []
+    first_day = timezone.localdate(first)
+    return [first_day + timedelta(days=offset) for offset in range((timezone.localdate() - first_day).days + 1)]
+
+
+def rebuild_daily_rollup(day):
+    """
+    Пересчитывает суточные итоги одного дня.
+
+    Принятое - одна группирующая выборка по индексу created_at, выданное -
+    переходы в ISSUED за день (индекс (to_status, at)) с данными оборудования.
+
+    Args:
+        day (date): День
+
+    Returns:
+        int: Количество строк итогов дня
+    """
+    start, end = _local_day_start(day), _local_day_start(day + timedelta(days=1))
+    rows = {}
+
+    def row(key):
+        return rows.setdefault(key, {
+            'received': 0, 'issued': 0, 'histogram': Counter(), 'cost': Decimal('0'),
+        })
+
+    received = ReceivedEquipment.objects.filter(
+        created_at__gte=start, created_at__lt=end
+    ).order_by().values_list(
+        'department', 'model__category_id', 'reception_act__client_id', 'guarantee_type'
+    ).annotate(total=Count('id'))
+    for department, category_id, client_id, guarantee_type, total in received:
+        row((department, category_id, client_id, guarantee_type))['received'] = total
+
+    issued = EquipmentStatusTransition.objects.filter(
+        to_status='ISSUED', at__gte=start, at__lt=end
+    ).values_list(
+        'equipment__department', 'equipment__model__category_id', 'equipment__reception_act__client_id',
+        'equipment__guarantee_type', 'equipment__created_at', 'equipment__estimated_cost',
+    )
+    for department, category_id, client_id, guarantee_type, created_at, cost in issued:
+        data = row((department, category_id, client_id, guarantee_type))
+        data['issued'] += 1
+        # Срок ремонта в днях - как на панели координатора (разница дат)
+        data['histogram'][(day - timezone.localdate(created_at)).days] += 1
+        data['cost'] += cost or 0
+
+    rollups = [
+        DailyEquipmentRollup(
+            day=day,
+            department=department,
+            category_id=category_id,
+            client_id=client_id,
+            guarantee_type=guarantee_type,
+            received=data['received'],
+            issued=data['issued'],
+            repair_days_median=_histogram_percentile(data['histogram'], 50),
+            repair_days_p90=_histogram_percentile(data['histogram'], 90),
+            repair_days_histogram={str(days): count for days, count in data['histogram'].items()},
+            estimated_cost_total=data['cost'],
+        )
+        for (department, category_id, client_id, guarantee_type), data in rows.items()
+    ]
+
+    with transaction.atomic():
+        DailyEquipmentRollup.objects.filter(day=day).delete()
+        DailyEquipmentRollup.objects.bulk_create(rollups)
+    return len(rollups)
+
+
+def turnaround_report(date_from, date_to, group_by='department'):
+    """
+    Отчёт по приёмке, выдаче и срокам ремонта за период.
+
+    Читает только суточные итоги: суммы - группирующей выборкой в базе,
+    процентили срока ремонта - по сложенным распределениям дней.
+
+    Args:
+        date_from (date): Первый день периода
+        date_to (date): Последний день периода
+        group_by (str): Разрез из ROLLUP_GROUPS
+
+    Returns:
+        list: Строки {'key', 'name', 'received', 'issued', 'repair_days_median',
+            'repair_days_p90', 'estimated_cost_total'} по убыванию выданного
+    """
+    rollups = DailyEquipmentRollup.objects.filter(day__gte=date_from, day__lte=date_to)
+
+    totals = rollups.order_by().values(group_by).annotate(
+        received_total=Sum('received'),
+        issued_total=Sum('issued'),
+        cost_total=Sum('estimated_cost_total'),
+    )
+
+    histograms = {}
+    for key, histogram in rollups.filter(issued__gt=0).values_list(group_by, 'repair_days_histogram'):
+        merged = histograms.setdefault(key, Counter())
+        for days, count in histogram.items():
+            merged[int(days)] += count
+
+    keys = [row[group_by] for row in totals]
+    if group_by == 'department':
+        names = dict(EquipmentCategory.DEPARTAMENT_CHOICES)
+    elif group_by == 'guarantee_type':
+        names = dict(ReceivedEquipment.GUARANTEE_CHOICES)
+    elif group_by == 'category':
+        names = dict(EquipmentCategory.objects.filter(pk__in=keys).values_list('pk', 'name'))
+    else:
+        names = dict(Client.objects.filter(pk__in=keys).values_list('pk', 'short_name'))
+
+    report = []
+    for row in totals:
+        key = row[group_by]
+        histogram = histograms.get(key, Counter())
+        report.append({
+            'key': key,
+            'name': names.get(key) or '—',
+            'received': row['received_total'],
+            'issued': row['issued_total'],
+            'repair_days_median': _histogram_percentile(histogram, 50),
+            'repair_days_p90': _histogram_percentile(histogram, 90),
+            'estimated_cost_total': row['cost_total'],
+        })
+    report.sort(key=lambda item: (-item['issued'], -item['received']))
+    return report
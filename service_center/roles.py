@@ -0,0 +1,47 @@
+"""
+Активные роли пользователя.
+
+Набор названий активных ролей загружается одним запросом на время запроса
+и доступен как request.active_roles (см. middleware.ActiveRolesMiddleware).
+Между запросами роли не кэшируются: кэш по умолчанию (LocMemCache) у каждого
+процесса свой, и снятая в админке роль продолжала бы действовать в других
+рабочих процессах до истечения срока кэша.
+"""
+
+from .models import UserRole
+
+
+def get_active_roles(user):
+    """
+    Названия активных ролей пользователя.
+
+    Args:
+        user: Пользователь Django (в том числе анонимный)
+
+    Returns:
+        frozenset: Названия активных ролей
+    """
+    if not user.is_authenticated:
+        return frozenset()
+    return frozenset(
+        UserRole.objects.filter(user=user, is_active=True).values_list('role__name', flat=True)
+    )
+
+
+def has_role(request, *role_names):
+    """
+    Проверяет, есть ли у текущего пользователя хотя бы одна из указанных ролей.
+
+    Использует request.active_roles, а без middleware загружает роли сам.
+
+    Args:
+        request: Объект запроса
+        *role_names (str): Названия ролей
+
+    Returns:
+        bool: True, если хотя бы одна роль активна
+    """
+    roles = getattr(request, 'active_roles', None)
+    if roles is None:
+        roles = get_active_roles(request.user)
+    return any(role_name in roles for role_name in role_names)
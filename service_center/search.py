@@ -0,0 +1,278 @@
+"""
+Полнотекстовый поиск по оборудованию, актам приёмки и клиентам (SQLite FTS5).
+
+Индекс - виртуальная таблица FTS5 с двумя столбцами: title (номера,
+бренд и модель оборудования, наименования; больший вес при ранжировании) и body (описание неисправности,
+результат диагностики, выполненные работы, полное наименование клиента).
+Каждый объект - одна строка индекса; rowid кодирует вид объекта и его ID
+(ID * SEARCH_KIND_COUNT + код вида), поэтому строка объекта заменяется
+и удаляется по rowid без просмотра индекса.
+
+Индекс поддерживают триггеры базы данных, а не сигналы: оборудование
+создаётся через bulk_create() и изменяется через QuerySet.update(), где
+сигналы моделей не отправляются. Таблица и триггеры создаются после
+migrate (сигнал post_migrate) и командой rebuild_search_index, которая
+также заполняет индекс заново.
+"""
+
+import re
+
+from django.db import connection, transaction
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Brand, Client, EquipmentModel, ReceivedEquipment, ReceptionAct
+
+SEARCH_TABLE = 'service_center_search'
+
+# Коды видов объектов в rowid индекса
+SEARCH_KINDS = {
+    'equipment': 1,
+    'act': 2,
+    'client': 3,
+}
+SEARCH_KIND_COUNT = 4
+
+SEARCH_KIND_TITLES = {
+    'equipment': 'Оборудование',
+    'act': 'Акт приёмки',
+    'client': 'Клиент',
+}
+
+# Веса столбцов title и body для bm25()
+SEARCH_WEIGHTS = (10.0, 1.0)
+
+# Не больше стольких слов запроса учитывается при поиске
+SEARCH_MAX_TERMS = 8
+
+# Слова запроса - так же, как их выделяет токенизатор unicode61 (буквы и цифры)
+_TERM_RE = re.compile(r'[^\W_]+')
+
+# Границы совпадений во фрагменте snippet() (символы, которых нет в тексте)
+_MATCH_START, _MATCH_END = '\x02', '\x03'
+
+
+def _document_sql(kind):
+    """
+    Выражения (rowid, title, body) строки индекса для записи new/old
+    в триггере или для строки таблицы в INSERT ... SELECT.
+    """
+    code, count = SEARCH_KINDS[kind], SEARCH_KIND_COUNT
+    if kind == 'equipment':
+        return (
+            f"{{row}}id * {count} + {code}",
+            # Бренд и модель - из каталога (изменения каталога переносят триггеры _catalog_statements())
+            f"coalesce((SELECT b.name || ' ' || m.name FROM {EquipmentModel._meta.db_table} m "
+            f"JOIN {Brand._meta.db_table} b ON b.id = m.brand_id WHERE m.id = {{row}}model_id), '')"
+            " || ' ' || coalesce({row}serial_number, '') || ' ' || coalesce({row}inventory_number, '')",
+            "coalesce({row}defect_description, '') || ' ' || coalesce({row}diagnosis_result, '')"
+            " || ' ' || coalesce({row}repair_notes, '')",
+        )
+    if kind == 'act':
+        return (f"{{row}}id * {count} + {code}", "{row}act_number", "''")
+    return (f"{{row}}id * {count} + {code}", "{row}short_name", "{row}full_name")
+
+
+# Таблицы и поля, изменение которых меняет строку индекса
+_INDEXED_TABLES = {
+    'equipment': (ReceivedEquipment, (
+        'model_id', 'serial_number', 'inventory_number', 'defect_description', 'diagnosis_result', 'repair_notes',
+    )),
+    'act': (ReceptionAct, ('act_number',)),
+    'client': (Client, ('short_name', 'full_name')),
+}
+
+
+def _trigger(name, definition):
+    """
+    Пересоздание триггера (определение могло измениться с прошлой версии).
+    """
+    return [f"DROP TRIGGER IF EXISTS {name}", f"CREATE TRIGGER {name} {definition}"]
+
+
+def _catalog_statements():
+    """
+    Триггеры каталога: переименование бренда или модели и перенос модели
+    к другому бренду заново индексируют оборудование этих моделей.
+    """
+    equipment_table = ReceivedEquipment._meta.db_table
+    model_table = EquipmentModel._meta.db_table
+    rowid, title, body = (expression.format(row='e.') for expression in _document_sql('equipment'))
+
+    statements = []
+    for table, fields, equipment_filter in (
+        (model_table, 'name, brand_id', 'e.model_id = new.id'),
+        (Brand._meta.db_table, 'name', f'e.model_id IN (SELECT id FROM {model_table} WHERE brand_id = new.id)'),
+    ):
+        statements += _trigger(
+            f"{table}_search_au",
+            f"AFTER UPDATE OF {fields} ON {table} BEGIN "
+            f"DELETE FROM {SEARCH_TABLE} WHERE rowid IN "
+            f"(SELECT {rowid} FROM {equipment_table} e WHERE {equipment_filter}); "
+            f"INSERT INTO {SEARCH_TABLE}(rowid, title, body) "
+            f"SELECT {rowid}, {title}, {body} FROM {equipment_table} e WHERE {equipment_filter}; "
+            f"END"
+        )
+    return statements
+
+
+def _schema_statements():
+    """
+    SQL создания таблицы индекса и триггеров (таблица создаётся, если её нет;
+    триггеры пересоздаются).
+    """
+    statements = [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+        f"title, body, tokenize = 'unicode61 remove_diacritics 2')"
+    ]
+    for kind, (model, fields) in _INDEXED_TABLES.items():
+        table = model._meta.db_table
+        rowid, title, body = _document_sql(kind)
+        insert = (
+            f"INSERT INTO {SEARCH_TABLE}(rowid, title, body) VALUES "
+            f"({rowid.format(row='new.')}, {title.format(row='new.')}, {body.format(row='new.')});"
+        )
+        delete = f"DELETE FROM {SEARCH_TABLE} WHERE rowid = {rowid.format(row='old.')};"
+        statements += _trigger(f"{table}_search_ai", f"AFTER INSERT ON {table} BEGIN {insert} END")
+        statements += _trigger(
+            f"{table}_search_au", f"AFTER UPDATE OF {', '.join(fields)} ON {table} BEGIN {delete} {insert} END"
+        )
+        statements += _trigger(f"{table}_search_ad", f"AFTER DELETE ON {table} BEGIN {delete} END")
+    return statements + _catalog_statements()
+
+
+def ensure_search_index(using=None):
+    """
+    Создаёт таблицу индекса, если её ещё нет, и пересоздаёт триггеры.
+
+    Args:
+        using: Соединение с базой (по умолчанию - основное)
+
+    Returns:
+        bool: False, если база не SQLite (поиск недоступен)
+    """
+    using = using or connection
+    if using.vendor != 'sqlite':
+        return False
+    with using.cursor() as cursor:
+        for statement in _schema_statements():
+            cursor.execute(statement)
+    return True
+
+
+def rebuild_search_index():
+    """
+    Заполняет индекс заново по текущим данным (INSERT ... SELECT в базе).
+
+    Returns:
+        int: Количество строк индекса
+    """
+    ensure_search_index()
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+        for kind, (model, fields) in _INDEXED_TABLES.items():
+            rowid, title, body = (expression.format(row='t.') for expression in _document_sql(kind))
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE}(rowid, title, body) "
+                f"SELECT {rowid}, {title}, {body} FROM {model._meta.db_table} t"
+            )
+        # Слияние сегментов индекса после массовой вставки
+        cursor.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('optimize')")
+        cursor.execute(f"SELECT count(*) FROM {SEARCH_TABLE}")
+        return cursor.fetchone()[0]
+
+
+def build_match_query(text):
+    """
+    Запрос MATCH по тексту пользователя: каждое слово - префикс,
+    все слова обязательны. Синтаксис FTS5 из текста не используется.
+
+    Args:
+        text (str): Текст поиска
+
+    Returns:
+        str: Запрос FTS5 или '' (в тексте нет слов)
+    """
+    terms = _TERM_RE.findall(text.casefold())[:SEARCH_MAX_TERMS]
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def _snippet_parts(snippet):
+    """
+    Фрагмент snippet() в виде частей [(текст, совпадение)] для шаблона.
+    """
+    parts = []
+    for index, part in enumerate(re.split(f'[{_MATCH_START}{_MATCH_END}]', snippet)):
+        if part:
+            parts.append((part, index % 2 == 1))
+    return parts
+
+
+def global_search(text, limit=20):
+    """
+    Ищет оборудование, акты и клиентов по индексу с ранжированием bm25.
+
+    Args:
+        text (str): Текст поиска
+        limit (int): Максимальное количество результатов
+
+    Returns:
+        list: Результаты по убыванию релевантности:
+            {'kind', 'kind_display', 'id', 'title', 'subtitle', 'url', 'snippet', 'snippet_parts'}
+    """
+    query = build_match_query(text)
+    if not query or connection.vendor != 'sqlite':
+        return []
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid, snippet({SEARCH_TABLE}, -1, %s, %s, '…', 12) FROM {SEARCH_TABLE} "
+            f"WHERE {SEARCH_TABLE} MATCH %s ORDER BY bm25({SEARCH_TABLE}, %s, %s) LIMIT %s",
+            [_MATCH_START, _MATCH_END, query, *SEARCH_WEIGHTS, limit],
+        )
+        matches = cursor.fetchall()
+
+    codes = {code: kind for kind, code in SEARCH_KINDS.items()}
+    hits = [(codes.get(rowid % SEARCH_KIND_COUNT), rowid // SEARCH_KIND_COUNT, snippet) for rowid, snippet in matches]
+    ids = {kind: [object_id for hit_kind, object_id, _ in hits if hit_kind == kind] for kind in SEARCH_KINDS}
+
+    equipment = ReceivedEquipment.objects.select_related(
+        'model__brand', 'reception_act__client'
+    ).in_bulk(ids['equipment'])
+    acts = ReceptionAct.objects.select_related('client').in_bulk(ids['act'])
+    clients = Client.objects.in_bulk(ids['client'])
+
+    results = []
+    for kind, object_id, snippet in hits:
+        if kind == 'equipment' and object_id in equipment:
+            item = equipment[object_id]
+            title = f"{item.model.brand.name} {item.model.name}, S/N {item.serial_number or '—'}"
+            subtitle = (
+                f"Акт {item.reception_act.act_number}, {item.reception_act.client.short_name}, "
+                f"{item.get_status_display()}"
+            )
+            url = reverse('reception_act_detail', args=[item.reception_act_id])
+        elif kind == 'act' and object_id in acts:
+            item = acts[object_id]
+            title = f"Акт {item.act_number}"
+            subtitle = f"{item.client.short_name}, {timezone.localtime(item.created_at):%d.%m.%Y}"
+            url = reverse('reception_act_detail', args=[item.pk])
+        elif kind == 'client' and object_id in clients:
+            item = clients[object_id]
+            title = item.short_name
+            subtitle = f"{item.full_name}, {item.contact_person}, {item.phone}"
+            url = None
+        else:
+            # Строка индекса без объекта (данные изменены в обход триггеров)
+            continue
+        results.append({
+            'kind': kind,
+            'kind_display': SEARCH_KIND_TITLES[kind],
+            'id': object_id,
+            'title': title,
+            'subtitle': subtitle,
+            'url': url,
+            'snippet': snippet.replace(_MATCH_START, '').replace(_MATCH_END, ''),
+            'snippet_parts': _snippet_parts(snippet),
+        })
+    return results
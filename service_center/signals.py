@@ -0,0 +1,147 @@
+"""
+Обработчики сигналов моделей приложения ServiceHub.
+
+Подключаются в ServiceCenterConfig.ready().
+"""
+
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .catalog import bump_catalog_version
+from .models import (
+    Brand, CatalogDeletion, DailyRollupStaleDay, EquipmentCategory, EquipmentEvent, EquipmentModel,
+    EquipmentStatusCounter, EquipmentStatusTransition, ReceivedEquipment,
+)
+from .search import ensure_search_index
+
+
+@receiver(post_save, sender=EquipmentCategory)
+@receiver(post_delete, sender=EquipmentCategory)
+@receiver(post_save, sender=Brand)
+@receiver(post_delete, sender=Brand)
+@receiver(post_save, sender=EquipmentModel)
+@receiver(post_delete, sender=EquipmentModel)
+def invalidate_catalog_cache(sender, **kwargs):
+    """
+    Сбрасывает кэш каталога при изменении категорий, брендов и моделей
+    (через API формы акта или через админку).
+
+    Версия меняется после фиксации транзакции, чтобы ответы не были
+    построены заново из ещё не сохранённых данных.
+    """
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(post_delete, sender=EquipmentCategory)
+@receiver(post_delete, sender=Brand)
+@receiver(post_delete, sender=EquipmentModel)
+def record_catalog_deletion(sender, instance, **kwargs):
+    """
+    Запоминает удаление элемента каталога, чтобы инкрементальная
+    синхронизация формы акта убрала его из локальной копии.
+    """
+    kinds = {EquipmentCategory: 'category', Brand: 'brand', EquipmentModel: 'model'}
+    CatalogDeletion.objects.create(kind=kinds[sender], object_id=instance.pk)
+
+
+def _move_equipment_department(equipment, department):
+    """
+    Переводит оборудование в другой цех одним UPDATE и записывает события
+    для панелей (QuerySet.update() не отправляет post_save).
+
+    В событии передаётся прежний цех, чтобы панель прежнего цеха убрала строки.
+    """
+    moved = {}
+    for equipment_id, previous_department in equipment.exclude(
+        department=department
+    ).values_list('id', 'department'):
+        moved.setdefault(previous_department, []).append(equipment_id)
+    if not moved:
+        return
+
+    # updated_at сдвигается, чтобы суточные итоги этого оборудования пересчитались
+    ReceivedEquipment.objects.filter(
+        pk__in=[equipment_id for ids in moved.values() for equipment_id in ids]
+    ).update(department=department, updated_at=timezone.now())
+    for previous_department, ids in moved.items():
+        EquipmentEvent.record(
+            ReceivedEquipment.objects.filter(pk__in=ids), 'updated', previous_department=previous_department
+        )
+    # Оборудование перешло в другой цех: счётчики пересчитываются целиком
+    EquipmentStatusCounter.rebuild()
+
+
+@receiver(post_save, sender=EquipmentCategory)
+def sync_category_department(sender, instance, created, **kwargs):
+    """
+    Переносит смену цеха категории в ReceivedEquipment.department.
+    """
+    if created:
+        return
+    _move_equipment_department(ReceivedEquipment.objects.filter(model__category=instance), instance.department)
+
+
+@receiver(post_save, sender=EquipmentModel)
+def sync_model_department(sender, instance, created, **kwargs):
+    """
+    Переносит перенос модели в другую категорию в ReceivedEquipment.department.
+    """
+    if created:
+        return
+    department = EquipmentCategory.objects.filter(
+        pk=instance.category_id
+    ).values_list('department', flat=True).first()
+    _move_equipment_department(ReceivedEquipment.objects.filter(model=instance), department)
+
+
+@receiver(pre_delete, sender=ReceivedEquipment)
+def mark_rollup_days_stale(sender, instance, **kwargs):
+    """
+    Отмечает дни приёмки и выдачи удаляемого оборудования для пересчёта
+    суточных итогов (история статусов удаляется вместе с оборудованием,
+    поэтому дни выдачи читаются до удаления).
+    """
+    days = {timezone.localdate(instance.created_at)}
+    days.update(
+        timezone.localdate(at) for at in EquipmentStatusTransition.objects.filter(
+            equipment=instance, to_status='ISSUED'
+        ).values_list('at', flat=True)
+    )
+    DailyRollupStaleDay.objects.bulk_create([DailyRollupStaleDay(day=day) for day in days])
+
+
+@receiver(post_delete, sender=ReceivedEquipment)
+def decrement_equipment_counter(sender, instance, **kwargs):
+    """
+    Уменьшает счётчик цеха и статуса при удалении оборудования
+    (в том числе вместе с актом приёмки).
+    """
+    EquipmentStatusCounter.apply({(instance.department, instance.status): -1})
+
+
+@receiver(post_save, sender=ReceivedEquipment)
+def record_equipment_change(sender, instance, created, **kwargs):
+    """
+    Записывает изменение оборудования в журнал для живого обновления панелей.
+    """
+    EquipmentEvent.record([instance], 'created' if created else 'updated')
+
+
+@receiver(post_delete, sender=ReceivedEquipment)
+def record_equipment_deletion(sender, instance, **kwargs):
+    """
+    Записывает удаление оборудования в журнал для живого обновления панелей.
+    """
+    EquipmentEvent.record([instance], 'deleted')
+
+
+@receiver(post_migrate)
+def create_search_index(sender, using, **kwargs):
+    """
+    Создаёт таблицу полнотекстового поиска и триггеры после migrate
+    (в том числе для тестовой базы). Заполняет индекс команда rebuild_search_index.
+    """
+    if sender.name == 'service_center':
+        ensure_search_index(connections[using])
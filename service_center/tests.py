@@ -1,3 +1,973 @@
-from django.test import TestCase
+import io
+import json
+import re
+import zipfile
+from collections import Counter
+from datetime import timedelta
+from unittest import mock, skipUnless
+from xml.etree import ElementTree
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import AsyncClient, TestCase
+from django.urls import reverse
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from asgiref.sync import sync_to_async
+
+from .admin import EquipmentPaginator, ReceivedEquipmentAdminForm
+from .exports import iterate_async
+from .models import (
+    ActNumberSequence, Brand, Client, DailyEquipmentRollup, DailyRollupRun, EquipmentCategory, EquipmentEvent, EquipmentModel, EquipmentStatusCounter,
+    EquipmentStatusTransition, ReceivedEquipment, ReceptionAct, Role, UserRole,
+)
+
+# Полный просмотр таблицы оборудования в плане SQLite: "SCAN <таблица>" без "USING ... INDEX"
+FULL_SCAN_RE = re.compile(r'^SCAN %s(?: AS \w+)?$' % ReceivedEquipment._meta.db_table)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Планы запросов проверяются для SQLite')
+class EquipmentQueryPlanTests(TestCase):
+    """
+    Запросы панелей к ReceivedEquipment не должны читать таблицу целиком.
+
+    Запросы снимаются с реальных представлений и проверяются через
+    EXPLAIN QUERY PLAN.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='specialist', password='password')
+        for role_name in ('Координатор', 'Электронщик'):
+            UserRole.objects.create(user=cls.user, role=Role.objects.create(name=role_name))
+
+        client = Client.objects.create(short_name='Ромашка', full_name='ООО Ромашка',
+                                       contact_person='Иванов', phone='+7 (900) 000-00-00')
+        category = EquipmentCategory.objects.create(name='Осциллографы', department='ELECTRON')
+        brand = Brand.objects.create(name='Rigol', category=category)
+        model = EquipmentModel.objects.create(name='DS1054Z', brand=brand, category=category)
+        act = ReceptionAct.objects.create(act_number='01012026-1', client=client, receiver=cls.user)
+
+        statuses = [status for status, _ in ReceivedEquipment.STATUS_CHOICES]
+        ReceivedEquipment.objects.bulk_create([
+            ReceivedEquipment(reception_act=act, model=model, department=category.department,
+                              status=statuses[i % len(statuses)])
+            for i in range(200)
+        ])
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def assertNoFullScan(self, sql, params=()):
+        """
+        Проверяет план запроса на отсутствие полного просмотра таблицы оборудования.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            steps = [row[-1] for row in cursor.fetchall()]
+        full_scans = [step for step in steps if FULL_SCAN_RE.match(step)]
+        self.assertFalse(full_scans, f'Полный просмотр таблицы:\n{sql}\n{steps}')
+
+    def assertNoSort(self, sql, params=()):
+        """
+        Проверяет, что порядок строк берётся из индекса (LIMIT останавливает чтение).
+        """
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            steps = [row[-1] for row in cursor.fetchall()]
+        sorts = [step for step in steps if 'TEMP B-TREE FOR ORDER BY' in step]
+        self.assertFalse(sorts, f'Сортировка всей выборки:\n{sql}\n{steps}')
+
+    def assertViewUsesIndexes(self, url, params=None):
+        """
+        Выполняет запрос к представлению и проверяет все его выборки оборудования.
+        """
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+
+        equipment_queries = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT') and ReceivedEquipment._meta.db_table in query['sql']
+        ]
+        self.assertTrue(equipment_queries, f'{url} не выбирает оборудование')
+        for sql in equipment_queries:
+            self.assertNoFullScan(sql)
+        return response
+
+    def test_coordinator_feed(self):
+        for params in [
+            {},
+            {'status': 'REPAIR'},
+            {'status': 'ISSUED'},
+            {'department': 'ELECTRON'},
+            {'client': 'ром'},
+            {'guarantee': 'NONE'},
+            {'priority': 1},
+            {'min_days': 3, 'max_days': 30},
+        ]:
+            with self.subTest(params=params):
+                self.assertViewUsesIndexes('/api/coordinator/equipment/', params)
+
+    def test_coordinator_feed_next_page(self):
+        response = self.client.get('/api/coordinator/equipment/')
+        self.assertViewUsesIndexes('/api/coordinator/equipment/', {'cursor': response.json()['next_cursor']})
+
+    def assertArchiveNotSorted(self, captured_queries):
+        """
+        Выборки архива электронщика (по updated_at) не сортируют весь архив.
+        """
+        archive_queries = [
+            query['sql'] for query in captured_queries
+            if query['sql'].startswith('SELECT') and '"updated_at" DESC' in query['sql']
+        ]
+        self.assertTrue(archive_queries, 'Нет выборки архива')
+        for sql in archive_queries:
+            self.assertNoSort(sql)
+
+    def test_electronic_dashboard(self):
+        with CaptureQueriesContext(connection) as context:
+            self.assertViewUsesIndexes('/electronic/dashboard/')
+        self.assertArchiveNotSorted(context.captured_queries)
+
+    def test_electronic_archive_next_page(self):
+        response = self.client.get('/electronic/dashboard/')
+        with CaptureQueriesContext(connection) as context:
+            self.assertViewUsesIndexes('/electronic/archive/', {'cursor': response.context['archive_next_cursor']})
+        self.assertArchiveNotSorted(context.captured_queries)
+
+    def test_ready_equipment(self):
+        # Выборка панели приёмщика (receiver_dashboard_view)
+        ready_equipment = ReceivedEquipment.objects.filter(
+            status='READY'
+        ).select_related(
+            'reception_act__client',
+            'model__brand',
+            'model__category'
+        ).order_by('-created_at')
+        self.assertNoFullScan(*ready_equipment.query.sql_with_params())
+
+    def test_default_ordering(self):
+        # Список в админке без фильтров (ordering модели)
+        self.assertNoFullScan(*ReceivedEquipment.objects.all()[:100].query.sql_with_params())
+
+
+class AdminChangelistQueryTests(TestCase):
+    """
+    Количество запросов страницы списка в админке не должно зависеть
+    от количества строк на странице (счётчики - аннотации запроса списка).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser(username='admin', password='password')
+        cls.client_record = Client.objects.create(short_name='Ромашка', full_name='ООО Ромашка',
+                                                  contact_person='Иванов', phone='+7 (900) 000-00-00')
+        cls.add_catalog(5)
+
+    @classmethod
+    def add_catalog(cls, count):
+        """
+        Добавляет категории, бренды, модели и акты с оборудованием (по count штук).
+        """
+        offset = EquipmentCategory.objects.count()
+        for i in range(offset, offset + count):
+            category = EquipmentCategory.objects.create(name=f'Категория {i}', department='ELECTRON')
+            brand = Brand.objects.create(name=f'Бренд {i}', category=category)
+            models = [
+                EquipmentModel.objects.create(name=f'Модель {i}-{j}', brand=brand, category=category)
+                for j in range(2)
+            ]
+            act = ReceptionAct.objects.create(act_number=f'01012026-{i}', client=cls.client_record,
+                                              receiver=cls.user)
+            ReceivedEquipment.objects.bulk_create([
+                ReceivedEquipment(reception_act=act, model=model, department='ELECTRON')
+                for model in models for _ in range(i % 3 + 1)
+            ])
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def count_queries(self, url, params=None):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def assertConstantQueries(self, model_name, sort_column):
+        """
+        Сравнивает количество запросов списка до и после добавления строк,
+        в том числе при сортировке по столбцу-счётчику.
+        """
+        url = reverse(f'admin:service_center_{model_name}_changelist')
+        before = self.count_queries(url)
+        before_sorted = self.count_queries(url, {'o': sort_column})
+
+        self.add_catalog(20)
+
+        self.assertEqual(self.count_queries(url), before)
+        self.assertEqual(self.count_queries(url, {'o': sort_column}), before_sorted)
+
+    def test_category_changelist(self):
+        # Столбцы list_display: name, department, get_brands_count, get_models_count
+        self.assertConstantQueries('equipmentcategory', '-3')
+        self.assertConstantQueries('equipmentcategory', '4')
+
+    def test_brand_changelist(self):
+        self.assertConstantQueries('brand', '-3')
+
+    def test_equipment_model_changelist(self):
+        self.assertConstantQueries('equipmentmodel', '-4')
+
+    def test_reception_act_changelist(self):
+        self.assertConstantQueries('receptionact', '-5')
+
+    def test_counts(self):
+        category = EquipmentCategory.objects.first()
+        response = self.client.get(reverse('admin:service_center_equipmentcategory_changelist'), {'o': '-4'})
+        counts = {obj.pk: (obj.brands_count, obj.models_count) for obj in response.context['cl'].result_list}
+        self.assertEqual(counts[category.pk], (category.brands.count(), category.models.count()))
+
+        act = ReceptionAct.objects.order_by('pk').last()
+        response = self.client.get(reverse('admin:service_center_receptionact_changelist'), {'o': '-5'})
+        result_list = list(response.context['cl'].result_list)
+        self.assertEqual(
+            [obj.equipment_count for obj in result_list],
+            sorted((obj.equipment_count for obj in result_list), reverse=True)
+        )
+        self.assertEqual({obj.pk: obj.equipment_count for obj in result_list}[act.pk], act.equipments.count())
+
+    def equipment_count_queries(self, params):
+        """
+        Запросы COUNT к таблице оборудования на странице списка оборудования.
+        """
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('admin:service_center_receivedequipment_changelist'), params)
+        self.assertEqual(response.status_code, 200)
+        return [
+            query['sql'] for query in context.captured_queries
+            if 'COUNT(' in query['sql'] and ReceivedEquipment._meta.db_table in query['sql']
+        ], response
+
+    def test_equipment_changelist_count(self):
+        # Без фильтров количество берётся из счётчиков по цеху и статусу
+        count_queries, _ = self.equipment_count_queries({})
+        self.assertEqual(count_queries, [])
+
+        # С фильтром и поиском - не больше COUNT_LIMIT строк
+        for params in [{'status__exact': 'WAITING'}, {'q': 'Модель 1'}, {'q': '01012026-1'}]:
+            with self.subTest(params=params):
+                count_queries, response = self.equipment_count_queries(params)
+                self.assertTrue(count_queries)
+                for sql in count_queries:
+                    self.assertIn(f'LIMIT {EquipmentPaginator.COUNT_LIMIT}', sql)
+                self.assertEqual(response.context['cl'].result_count,
+                                 response.context['cl'].queryset.count())
+
+    def test_equipment_search_by_model_prefix(self):
+        response = self.client.get(reverse('admin:service_center_receivedequipment_changelist'),
+                                   {'q': 'Модель 1-1'})
+        self.assertEqual(
+            {equipment.model.name for equipment in response.context['cl'].result_list}, {'Модель 1-1'}
+        )
+        response = self.client.get(reverse('admin:service_center_receivedequipment_changelist'),
+                                   {'q': 'одель 1-1'})
+        self.assertEqual(response.context['cl'].result_count, 0)
+
+
+class ActNumberSequenceTests(TestCase):
+    """
+    Выдача порядковых номеров актов счётчиком года.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.year = timezone.now().year
+        user = User.objects.create_user(username='receiver', password='password')
+        client = Client.objects.create(short_name='Ромашка', full_name='ООО Ромашка',
+                                       contact_person='Иванов', phone='+7 (900) 000-00-00')
+        # Акт, выданный до появления счётчика
+        ReceptionAct.objects.create(act_number=f'0101{cls.year}-0007', client=client, receiver=user)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_peek_is_read_only(self):
+        self.assertEqual(ActNumberSequence.peek(self.year), 8)
+        # Начальное значение взято из кэша: только чтение строки счётчика
+        with self.assertNumQueries(1):
+            self.assertEqual(ActNumberSequence.peek(self.year), 8)
+        self.assertFalse(ActNumberSequence.objects.exists())
+
+    def test_sequential_values_are_unique(self):
+        values = [ActNumberSequence.next_value(self.year) for _ in range(20)]
+        self.assertEqual(values, list(range(8, 28)))
+        self.assertEqual(ActNumberSequence.peek(self.year), 28)
+
+    def test_year_rollover(self):
+        ActNumberSequence.next_value(self.year)
+        ActNumberSequence.next_value(self.year)
+
+        self.assertEqual(ActNumberSequence.next_value(self.year + 1), 1)
+        self.assertEqual(ActNumberSequence.next_value(self.year + 1), 2)
+        self.assertEqual(
+            dict(ActNumberSequence.objects.values_list('year', 'last_value')),
+            {self.year: 9, self.year + 1: 2},
+        )
+
+
+class EquipmentStatusCounterTests(TestCase):
+    """
+    Счётчики оборудования по цехам и статусам следуют за сохранением,
+    переводом в другой цех и удалением оборудования.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='coordinator', password='password')
+        UserRole.objects.create(user=cls.user, role=Role.objects.create(name='Координатор'))
+        cls.nobody = User.objects.create_user(username='nobody', password='password')
+
+        client = Client.objects.create(short_name='Ромашка', full_name='ООО Ромашка',
+                                       contact_person='Иванов', phone='+7 (900) 000-00-00')
+        cls.electron = EquipmentCategory.objects.create(name='Осциллографы', department='ELECTRON')
+        cls.motor = EquipmentCategory.objects.create(name='Двигатели', department='MOTOR')
+        brand = Brand.objects.create(name='Rigol', category=cls.electron)
+        cls.model = EquipmentModel.objects.create(name='DS1054Z', brand=brand, category=cls.electron)
+        cls.motor_model = EquipmentModel.objects.create(name='АИР80', brand=brand, category=cls.motor)
+        act = ReceptionAct.objects.create(act_number='01012026-1', client=client, receiver=cls.user)
+        cls.equipment = [ReceivedEquipment.objects.create(reception_act=act, model=cls.model) for _ in range(2)]
+
+    def assertCounters(self, expected):
+        self.assertEqual(EquipmentStatusCounter.as_dict(), expected)
+        self.assertEqual(
+            EquipmentStatusCounter.as_dict(),
+            {department: dict(Counter(
+                ReceivedEquipment.objects.filter(department=department).values_list('status', flat=True)
+            )) for department in ReceivedEquipment.objects.values_list('department', flat=True).distinct()},
+        )
+
+    def test_status_change(self):
+        equipment = self.equipment[0]
+        equipment.status = 'REPAIR'
+        equipment.save(update_fields=['status'])
+        self.assertCounters({'ELECTRON': {'WAITING': 1, 'REPAIR': 1}})
+
+        # Поле статуса не сохраняется - счётчики не меняются
+        equipment.status = 'READY'
+        equipment.save(update_fields=['priority'])
+        self.assertCounters({'ELECTRON': {'WAITING': 1, 'REPAIR': 1}})
+
+    def test_model_change(self):
+        equipment = self.equipment[0]
+        equipment.model = self.motor_model
+        equipment.save()
+        self.assertCounters({'ELECTRON': {'WAITING': 1}, 'MOTOR': {'WAITING': 1}})
+
+    def test_category_department_change(self):
+        self.electron.department = 'ELECTRO'
+        self.electron.save()
+        self.assertCounters({'ELECTRO': {'WAITING': 2}})
+
+    def test_model_category_change(self):
+        self.model.category = self.motor
+        self.model.save()
+        self.assertCounters({'MOTOR': {'WAITING': 2}})
+
+    def test_delete(self):
+        self.equipment[0].delete()
+        self.assertCounters({'ELECTRON': {'WAITING': 1}})
+
+        # Вместе с актом приёмки
+        self.equipment[1].reception_act.delete()
+        self.assertCounters({})
+
+    def test_api(self):
+        self.client.force_login(self.nobody)
+        self.assertEqual(self.client.get(reverse('equipment_counters')).status_code, 403)
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('equipment_counters'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['counters'], {'ELECTRON': {'WAITING': 2}})
+        self.assertEqual(response.json()['total'], 2)
+
+
+class BulkEquipmentUpdateTests(TestCase):
+    """
+    Массовое изменение оборудования: счётчики, история статусов, журнал
+    событий и версии обновляются вместе с UPDATE или не обновляются совсем.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='coordinator', password='password')
+        UserRole.objects.create(user=cls.user, role=Role.objects.create(name='Координатор'))
+
+        client = Client.objects.create(short_name='Ромашка', full_name='ООО Ромашка',
+                                       contact_person='Иванов', phone='+7 (900) 000-00-00')
+        category = EquipmentCategory.objects.create(name='Осциллографы', department='ELECTRON')
+        brand = Brand.objects.create(name='Rigol', category=category)
+        model = EquipmentModel.objects.create(name='DS1054Z', brand=brand, category=category)
+        act = ReceptionAct.objects.create(act_number='01012026-1', client=client, receiver=cls.user)
+        cls.equipment = [ReceivedEquipment.objects.create(reception_act=act, model=model) for _ in range(3)]
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def post_changes(self, changes):
+        return self.client.post(reverse('bulk_update_equipment'), json.dumps({'changes': changes}),
+                                content_type='application/json')
+
+    def assertCountersMatchTable(self):
+        """
+        Счётчики совпадают с группировкой по таблице оборудования.
+        """
+        expected = {}
+        for department, status in ReceivedEquipment.objects.values_list('department', 'status'):
+            expected.setdefault(department, {}).setdefault(status, 0)
+            expected[department][status] += 1
+        self.assertEqual(EquipmentStatusCounter.as_dict(), expected)
+
+    def test_status_change(self):
+        first, second, third = self.equipment
+        self.assertCountersMatchTable()
+        transitions = EquipmentStatusTransition.objects.count()
+        events = EquipmentEvent.objects.count()
+
+        response = self.post_changes([
+            {'id': first.pk, 'status': 'REPAIR', 'version': first.version},
+            {'id': second.pk, 'status': 'REPAIR', 'version': second.version},
+            {'id': third.pk, 'priority': 1, 'version': third.version},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(EquipmentStatusCounter.as_dict(), {'ELECTRON': {'WAITING': 1, 'REPAIR': 2}})
+        self.assertCountersMatchTable()
+        self.assertEqual(
+            list(EquipmentStatusTransition.objects.order_by('id').values_list(
+                'equipment_id', 'from_status', 'to_status'
+            )[transitions:]),
+            [(first.pk, 'WAITING', 'REPAIR'), (second.pk, 'WAITING', 'REPAIR')],
+        )
+        self.assertEqual(EquipmentEvent.objects.count(), events + 3)
+        versions = dict(ReceivedEquipment.objects.values_list('id', 'version'))
+        self.assertEqual(versions, {equipment.pk: equipment.version + 1 for equipment in self.equipment})
+        self.assertEqual(response.json()['versions'], {str(pk): version for pk, version in versions.items()})
+
+    def test_stale_version(self):
+        first, second, _ = self.equipment
+        # Другой пользователь изменил оборудование после загрузки страницы
+        ReceivedEquipment.objects.get(pk=second.pk).save()
+        transitions = EquipmentStatusTransition.objects.count()
+
+        response = self.post_changes([
+            {'id': first.pk, 'status': 'REPAIR', 'version': first.version},
+            {'id': second.pk, 'status': 'REPAIR', 'version': second.version},
+        ])
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(list(response.json()['conflicts']), [str(second.pk)])
+        # Ничего не изменено, в том числе оборудование с актуальной версией
+        self.assertEqual(ReceivedEquipment.objects.get(pk=first.pk).status, 'WAITING')
+        self.assertEqual(ReceivedEquipment.objects.get(pk=first.pk).version, first.version)
+        self.assertEqual(EquipmentStatusTransition.objects.count(), transitions)
+        self.assertCountersMatchTable()
+
+    def test_invalid_status(self):
+        first, second, _ = self.equipment
+
+        response = self.post_changes([
+            {'id': first.pk, 'status': 'REPAIR'},
+            {'id': second.pk, 'status': 'BROKEN'},
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.json()['errors']), [str(second.pk)])
+        self.assertEqual(ReceivedEquipment.objects.get(pk=first.pk).status, 'WAITING')
+        self.assertCountersMatchTable()
+
+
+class EquipmentVersionConflictTests(TestCase):
+    """
+    Сохранение по устаревшей версии оборудования (админка и API)
+    отклоняется и не перезаписывает чужие изменения.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser(username='admin', password='password')
+        UserRole.objects.create(user=cls.user, role=Role.objects.create(name='Координатор'))
+
+        client = Client.objects.create(short_name='Ромашка', full_name='ООО Ромашка',
+                                       contact_person='Иванов', phone='+7 (900) 000-00-00')
+        category = EquipmentCategory.objects.create(name='Осциллографы', department='ELECTRON')
+        brand = Brand.objects.create(name='Rigol', category=category)
+        model = EquipmentModel.objects.create(name='DS1054Z', brand=brand, category=category)
+        act = ReceptionAct.objects.create(act_number='01012026-1', client=client, receiver=cls.user)
+        cls.equipment = [ReceivedEquipment.objects.create(reception_act=act, model=model) for _ in range(2)]
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def change_by_other_user(self, equipment):
+        """
+        Изменение оборудования другим пользователем после загрузки страницы.
+        """
+        other = ReceivedEquipment.objects.get(pk=equipment.pk)
+        other.priority = 2
+        other.save(update_fields=['priority'])
+
+    def changelist_data(self):
+        """
+        Данные формы списка в админке в том виде, в каком их видел пользователь.
+        """
+        data = {
+            'form-TOTAL_FORMS': len(self.equipment),
+            'form-INITIAL_FORMS': len(self.equipment),
+            '_save': 'Сохранить',
+        }
+        for index, equipment in enumerate(self.equipment):
+            data.update({
+                f'form-{index}-id': equipment.pk,
+                f'form-{index}-expected_version': equipment.version,
+                f'form-{index}-status': equipment.status,
+                f'form-{index}-priority': equipment.priority,
+            })
+        return data
+
+    def test_changelist_renders_versions(self):
+        response = self.client.get(reverse('admin:service_center_receivedequipment_changelist'))
+        for index in range(len(self.equipment)):
+            self.assertContains(response, f'name="form-{index}-expected_version"')
+
+    def test_changelist_stale_row(self):
+        stale, untouched = self.equipment
+        self.change_by_other_user(stale)
+        # Устаревшая строка без правок сохранению не мешает
+        self.change_by_other_user(untouched)
+
+        data = self.changelist_data()
+        data['form-0-status'] = 'REPAIR'
+        response = self.client.post(reverse('admin:service_center_receivedequipment_changelist'), data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(f'#{stale.pk}', str(response.context['cl'].formset.non_form_errors()))
+        stale.refresh_from_db()
+        self.assertEqual((stale.status, stale.priority), ('WAITING', 2))
+
+    def test_changelist_current_row(self):
+        stale, _ = self.equipment
+        data = self.changelist_data()
+        data['form-0-status'] = 'REPAIR'
+
+        response = self.client.post(reverse('admin:service_center_receivedequipment_changelist'), data)
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(ReceivedEquipment.objects.get(pk=stale.pk).status, 'REPAIR')
+
+    def test_change_form_conflict_on_save(self):
+        equipment = self.equipment[0]
+        url = reverse('admin:service_center_receivedequipment_change', args=[equipment.pk])
+        data = self.client.get(url).context['adminform'].form.initial
+        data = {name: value for name, value in data.items() if value is not None}
+        data.update({
+            'status': 'REPAIR',
+            'expected_version': equipment.version,
+            'status_history-TOTAL_FORMS': 0,
+            'status_history-INITIAL_FORMS': 0,
+        })
+        self.change_by_other_user(equipment)
+
+        # Запись изменена между проверкой формы и сохранением
+        with mock.patch.object(ReceivedEquipmentAdminForm, 'clean', lambda form: form.cleaned_data):
+            response = self.client.post(url, data)
+
+        self.assertRedirects(response, url, fetch_redirect_response=False)
+        equipment.refresh_from_db()
+        self.assertEqual((equipment.status, equipment.priority), ('WAITING', 2))
+
+    def test_api_stale_version(self):
+        equipment = self.equipment[0]
+        self.change_by_other_user(equipment)
+
+        response = self.client.post(reverse('update_equipment_priority'), json.dumps({
+            'equipment_id': equipment.pk, 'priority': 1, 'version': equipment.version,
+        }), content_type='application/json')
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(ReceivedEquipment.objects.get(pk=equipment.pk).priority, 2)
+
+    def test_api_status_stale_version(self):
+        equipment = self.equipment[0]
+        url = reverse('update_equipment_status_api')
+        self.change_by_other_user(equipment)
+
+        response = self.client.post(url, json.dumps({
+            'equipment_id': equipment.pk, 'status': 'REPAIR', 'version': equipment.version,
+        }), content_type='application/json')
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(ReceivedEquipment.objects.get(pk=equipment.pk).status, 'WAITING')
+
+        response = self.client.post(url, json.dumps({
+            'equipment_id': equipment.pk, 'status': 'REPAIR', 'version': equipment.version + 1,
+        }), content_type='application/json')
+
+        self.assertEqual(response.json()['version'], equipment.version + 2)
+        self.assertEqual(ReceivedEquipment.objects.get(pk=equipment.pk).status, 'REPAIR')
+
+
+class ElectronicStatusUpdateTests(TestCase):
+    """
+    Смена статуса электронщиком: статус проверяется, история статусов
+    и счётчики пишутся в одной транзакции с сохранением оборудования.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='electronic', password='password')
+        UserRole.objects.create(user=cls.user, role=Role.objects.create(name='Электронщик'))
+
+        client = Client.objects.create(short_name='Ромашка', full_name='ООО Ромашка',
+                                       contact_person='Иванов', phone='+7 (900) 000-00-00')
+        category = EquipmentCategory.objects.create(name='Осциллографы', department='ELECTRON')
+        brand = Brand.objects.create(name='Rigol', category=category)
+        model = EquipmentModel.objects.create(name='DS1054Z', brand=brand, category=category)
+        act = ReceptionAct.objects.create(act_number='01012026-1', client=client, receiver=cls.user)
+        cls.equipment = ReceivedEquipment.objects.create(reception_act=act, model=model)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def post_status(self, status):
+        return self.client.post(reverse('update_equipment_status'), {
+            'equipment_id': self.equipment.pk, 'new_status': status, 'version': self.equipment.version,
+        })
+
+    def history(self):
+        return list(EquipmentStatusTransition.objects.filter(equipment=self.equipment).order_by('id').values_list(
+            'from_status', 'to_status'
+        ))
+
+    def test_status_change(self):
+        response = self.post_status('DIAGNOSIS')
+
+        self.assertRedirects(response, reverse('electronic_dashboard'), fetch_redirect_response=False)
+        self.assertEqual(ReceivedEquipment.objects.get(pk=self.equipment.pk).status, 'DIAGNOSIS')
+        self.assertEqual(self.history(), [('', 'WAITING'), ('WAITING', 'DIAGNOSIS')])
+        self.assertEqual(EquipmentStatusCounter.as_dict(), {'ELECTRON': {'DIAGNOSIS': 1}})
+
+    def test_invalid_status(self):
+        response = self.post_status('BROKEN')
+
+        self.assertRedirects(response, reverse('electronic_dashboard'), fetch_redirect_response=False)
+        self.assertEqual(ReceivedEquipment.objects.get(pk=self.equipment.pk).status, 'WAITING')
+        self.assertEqual(self.history(), [('', 'WAITING')])
+        self.assertEqual(EquipmentStatusCounter.as_dict(), {'ELECTRON': {'WAITING': 1}})
+
+    def test_history_failure_rolls_back_status(self):
+        # Ошибка записи истории отменяет и сохранение статуса, и изменение счётчиков
+        with mock.patch.object(EquipmentStatusTransition, 'record', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.post_status('DIAGNOSIS')
+
+        self.assertEqual(ReceivedEquipment.objects.get(pk=self.equipment.pk).status, 'WAITING')
+        self.assertEqual(self.history(), [('', 'WAITING')])
+        self.assertEqual(EquipmentStatusCounter.as_dict(), {'ELECTRON': {'WAITING': 1}})
+
+
+class EquipmentEventStreamTests(TestCase):
+    """
+    Поток событий оборудования: события только своего цеха, продолжение
+    с Last-Event-ID и короткий ответ под WSGI.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.electronic = User.objects.create_user(username='electronic', password='password')
+        UserRole.objects.create(user=cls.electronic, role=Role.objects.create(name='Электронщик'))
+        cls.coordinator = User.objects.create_user(username='coordinator', password='password')
+        UserRole.objects.create(user=cls.coordinator, role=Role.objects.create(name='Координатор'))
+        cls.nobody = User.objects.create_user(username='nobody', password='password')
+
+        client = Client.objects.create(short_name='Ромашка', full_name='ООО Ромашка',
+                                       contact_person='Иванов', phone='+7 (900) 000-00-00')
+        act = ReceptionAct.objects.create(act_number='01012026-1', client=client, receiver=cls.coordinator)
+        cls.equipment = {}
+        for department in ('ELECTRON', 'MOTOR'):
+            category = EquipmentCategory.objects.create(name=f'Категория {department}', department=department)
+            brand = Brand.objects.create(name=f'Бренд {department}', category=category)
+            model = EquipmentModel.objects.create(name=f'Модель {department}', brand=brand, category=category)
+            cls.equipment[department] = ReceivedEquipment.objects.create(reception_act=act, model=model)
+
+    def setUp(self):
+        patcher = mock.patch('service_center.views.EQUIPMENT_EVENTS_POLL_INTERVAL', 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def record_event(self, department):
+        EquipmentEvent.record([self.equipment[department]], 'updated')
+        return EquipmentEvent.objects.latest('id').pk
+
+    @staticmethod
+    def parse_events(text):
+        """
+        События SSE в виде [(ID события, ID оборудования)].
+        """
+        return [
+            (int(event_id), json.loads(data)['id'])
+            for event_id, data in re.findall(r'id: (\d+)\nevent: equipment\ndata: (.*)\n', text)
+        ]
+
+    async def read_stream(self, user, last_event_id, count):
+        """
+        Первые count частей потока ASGI, после чего соединение закрывается.
+        """
+        client = AsyncClient()
+        await client.aforce_login(user)
+        response = await client.get(reverse('equipment_events'), headers={'Last-Event-ID': str(last_event_id)})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        iterator = aiter(response.streaming_content)
+        try:
+            return [(await anext(iterator)).decode('utf-8') for _ in range(count)]
+        finally:
+            await iterator.aclose()
+
+    async def test_department_filter(self):
+        start = await EquipmentEvent.objects.order_by('-id').values_list('id', flat=True).afirst()
+        motor_event = await sync_to_async(self.record_event)('MOTOR')
+        electron_event = await sync_to_async(self.record_event)('ELECTRON')
+
+        header, message = await self.read_stream(self.electronic, start, 2)
+        self.assertIn(f'id: {start}\n', header)
+        # Событие другого цеха пропущено
+        self.assertEqual(self.parse_events(message), [(electron_event, self.equipment['ELECTRON'].pk)])
+
+        _, message = await self.read_stream(self.coordinator, start, 2)
+        self.assertEqual(self.parse_events(message), [(motor_event, self.equipment['MOTOR'].pk)])
+
+    async def test_no_role(self):
+        client = AsyncClient()
+        await client.aforce_login(self.nobody)
+        response = await client.get(reverse('equipment_events'))
+        self.assertEqual(response.status_code, 403)
+
+    async def test_resume_from_last_event_id(self):
+        first = await sync_to_async(self.record_event)('ELECTRON')
+        second = await sync_to_async(self.record_event)('ELECTRON')
+
+        _, message = await self.read_stream(self.electronic, first, 2)
+        self.assertEqual(self.parse_events(message), [(second, self.equipment['ELECTRON'].pk)])
+
+    def test_wsgi_short_response(self):
+        start = EquipmentEvent.objects.latest('id').pk
+        electron_event = self.record_event('ELECTRON')
+        motor_event = self.record_event('MOTOR')
+
+        self.client.force_login(self.electronic)
+        response = self.client.get(reverse('equipment_events'), HTTP_LAST_EVENT_ID=str(start))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.streaming)
+        text = response.content.decode('utf-8')
+        self.assertTrue(text.startswith('retry: 5000\n'))
+        self.assertEqual(self.parse_events(text), [(electron_event, self.equipment['ELECTRON'].pk)])
+        # Пропущенное событие другого цеха сдвигает ID для следующего опроса
+        self.assertTrue(text.endswith(f'id: {motor_event}\n\n'))
+
+
+class DailyRollupIncrementalTests(TestCase):
+    """
+    Инкрементальный расчёт суточных итогов учитывает удаление оборудования
+    и перевод в другой цех (изменения без сохранения через save()).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username='receiver', password='password')
+        client = Client.objects.create(short_name='Ромашка', full_name='ООО Ромашка',
+                                       contact_person='Иванов', phone='+7 (900) 000-00-00')
+        cls.category = EquipmentCategory.objects.create(name='Осциллографы', department='ELECTRON')
+        brand = Brand.objects.create(name='Rigol', category=cls.category)
+        model = EquipmentModel.objects.create(name='DS1054Z', brand=brand, category=cls.category)
+        act = ReceptionAct.objects.create(act_number='01012026-1', client=client, receiver=user)
+        cls.equipment = [ReceivedEquipment.objects.create(reception_act=act, model=model) for _ in range(3)]
+
+    def build_rollups(self):
+        call_command('build_daily_rollups', stdout=io.StringIO())
+        # Учтённые изменения - до начала расчёта: следующий расчёт их не видит
+        ReceivedEquipment.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+
+    def received_by_department(self):
+        return dict(DailyEquipmentRollup.objects.values_list('department', 'received'))
+
+    def test_deleted_equipment(self):
+        self.build_rollups()
+        self.equipment[0].delete()
+        self.build_rollups()
+        self.assertEqual(self.received_by_department(), {'ELECTRON': 2})
+        self.assertEqual(DailyRollupRun.objects.filter(full=False).count(), 1)
+
+    def test_department_move(self):
+        self.build_rollups()
+        self.category.department = 'MOTOR'
+        self.category.save()
+        self.build_rollups()
+        self.assertEqual(self.received_by_department(), {'MOTOR': 3})
+
+
+class ActiveRolesTests(TestCase):
+    """
+    Роли проверяются по базе в каждом запросе: снятая роль перестаёт
+    действовать сразу, в том числе в других процессах.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='coordinator', password='password')
+        cls.user_role = UserRole.objects.create(user=cls.user, role=Role.objects.create(name='Координатор'))
+
+    def test_revoked_role(self):
+        self.client.force_login(self.user)
+        url = reverse('export_reception_acts')
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        # Изменение в обход сигналов - как из другого процесса
+        UserRole.objects.filter(pk=self.user_role.pk).update(is_active=False)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_one_query_per_request(self):
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(reverse('export_reception_acts'))
+        self.assertEqual(
+            len([query for query in context.captured_queries if UserRole._meta.db_table in query['sql']]), 1
+        )
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Полнотекстовый поиск - SQLite FTS5')
+class GlobalSearchTests(TestCase):
+    """
+    Полнотекстовый поиск: доступ по ролям и индексация бренда и модели.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='receiver', password='password')
+        UserRole.objects.create(user=cls.user, role=Role.objects.create(name='Приёмщик'))
+        cls.specialist = User.objects.create_user(username='specialist', password='password')
+        UserRole.objects.create(user=cls.specialist, role=Role.objects.create(name='Электронщик'))
+
+        client = Client.objects.create(short_name='Ромашка', full_name='ООО Ромашка',
+                                       contact_person='Иванов', phone='+7 (900) 000-00-00')
+        category = EquipmentCategory.objects.create(name='Осциллографы', department='ELECTRON')
+        cls.brand = Brand.objects.create(name='Rigol', category=category)
+        model = EquipmentModel.objects.create(name='DS1054Z', brand=cls.brand, category=category)
+        act = ReceptionAct.objects.create(act_number='01012026-1', client=client, receiver=cls.user)
+        cls.equipment = ReceivedEquipment.objects.create(reception_act=act, model=model, serial_number='AB-123')
+
+    def search(self, query):
+        response = self.client.get(reverse('search_everything'), {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return [(result['kind'], result['id']) for result in response.json()['results']]
+
+    def test_roles(self):
+        self.client.force_login(self.specialist)
+        self.assertEqual(self.client.get(reverse('search_everything'), {'q': 'Ромашка'}).status_code, 403)
+        self.assertRedirects(self.client.get(reverse('search'), {'q': 'Ромашка'}), reverse('roles'),
+                             fetch_redirect_response=False)
+
+    def test_brand_and_model(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.search('DS1054'), [('equipment', self.equipment.pk)])
+        self.assertEqual(self.search('rigol ab-123'), [('equipment', self.equipment.pk)])
+
+        # Переименование бренда переиндексирует оборудование его моделей
+        self.brand.name = 'Keysight'
+        self.brand.save()
+        self.assertEqual(self.search('rigol'), [])
+        self.assertEqual(self.search('keysight'), [('equipment', self.equipment.pk)])
+
+
+class EquipmentExportTests(TestCase):
+    """
+    Выгрузка оборудования: файл отдаётся частями и под ASGI
+    (без чтения всей выгрузки в память), XLSX - корректная книга.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='coordinator', password='password')
+        UserRole.objects.create(user=cls.user, role=Role.objects.create(name='Координатор'))
+
+        client = Client.objects.create(short_name='Ромашка', full_name='ООО Ромашка',
+                                       contact_person='Иванов', phone='+7 (900) 000-00-00')
+        category = EquipmentCategory.objects.create(name='Осциллографы', department='ELECTRON')
+        brand = Brand.objects.create(name='Rigol', category=category)
+        model = EquipmentModel.objects.create(name='DS1054Z', brand=brand, category=category)
+        act = ReceptionAct.objects.create(act_number='01012026-1', client=client, receiver=cls.user)
+        cls.equipment = [
+            ReceivedEquipment.objects.create(reception_act=act, model=model, serial_number=f'SN-{i}')
+            for i in range(5)
+        ]
+
+    async def test_asgi_streaming(self):
+        client = AsyncClient()
+        await client.aforce_login(self.user)
+        response = await client.get(reverse('export_equipment'), {'format': 'csv'})
+
+        self.assertEqual(response.status_code, 200)
+        # Асинхронный итератор: ASGI-обработчик не собирает ответ в список
+        self.assertTrue(response.is_async)
+        chunks = []
+        async for chunk in response.streaming_content:
+            chunks.append(chunk)
+        # Заголовок и по части на строку
+        self.assertEqual(len(chunks), len(self.equipment) + 1)
+        lines = b''.join(chunks).decode('utf-8-sig').splitlines()
+        self.assertEqual(lines[0].split(';')[:3], ['ID', 'Номер акта', 'Дата акта'])
+        self.assertEqual([line.split(';')[8] for line in lines[1:]], [f'SN-{i}' for i in range(5)])
+
+    async def test_iterate_async_is_lazy(self):
+        produced = []
+
+        def chunks():
+            for i in range(3):
+                produced.append(i)
+                yield str(i)
+
+        iterator = iterate_async(chunks())
+        self.assertEqual(await anext(iterator), '0')
+        self.assertEqual(produced, [0])
+        self.assertEqual([chunk async for chunk in iterator], ['1', '2'])
+
+    def test_xlsx(self):
+        self.client.force_login(self.user)
+        # Несколько частей архива на пять строк
+        with mock.patch('service_center.exports.EXPORT_CHUNK_SIZE', 2):
+            response = self.client.get(reverse('export_equipment'), {'format': 'xlsx'})
+            chunks = list(response.streaming_content)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(len(chunks), 2)
+        with zipfile.ZipFile(io.BytesIO(b''.join(chunks))) as archive:
+            self.assertIsNone(archive.testzip())
+            workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+            sheet = ElementTree.fromstring(archive.read('xl/worksheets/sheet1.xml'))
+
+        namespace = {'x': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
+        self.assertEqual(workbook.find('x:sheets/x:sheet', namespace).get('name'), 'Оборудование')
+        rows = [
+            [''.join(cell.itertext()) for cell in row.findall('x:c', namespace)]
+            for row in sheet.findall('x:sheetData/x:row', namespace)
+        ]
+        self.assertEqual(len(rows), len(self.equipment) + 1)
+        self.assertEqual(rows[0][:2], ['ID', 'Номер акта'])
+        # ID - числовая ячейка, серийный номер - строка
+        self.assertEqual([row[0] for row in rows[1:]], [str(equipment.pk) for equipment in self.equipment])
+        self.assertEqual([row[8] for row in rows[1:]], [f'SN-{i}' for i in range(5)])
+        self.assertIsNone(sheet.find('x:sheetData/x:row[2]/x:c[1]', namespace).get('t'))
@@ -23,22 +23,48 @@ urlpatterns = [
 
     # Панель управления координатора
     path('coordinator-dashboard/', views.coordinator_dashboard_view, name='coordinator_dashboard'),
+    # Лента строк таблицы координатора (JSON)
+    path('api/coordinator/equipment/', views.coordinator_equipment_feed, name='coordinator_equipment_feed'),
+    # Количество оборудования по цехам и статусам
+    path('api/equipment/counters/', views.equipment_counters, name='equipment_counters'),
+    path('api/reports/status-durations/', views.status_durations_report, name='status_durations_report'),
+    path('reports/turnaround/', views.turnaround_report_view, name='turnaround_report'),
+    path('export/equipment/', views.export_equipment, name='export_equipment'),
+    path('export/reception-acts/', views.export_reception_acts, name='export_reception_acts'),
+    # Поток изменений оборудования (SSE)
+    path('api/equipment/events/', views.equipment_events, name='equipment_events'),
 
     path('electronic/dashboard/', views.electronic_dashboard, name='electronic_dashboard'),
+    path('electronic/archive/', views.electronic_archive_feed, name='electronic_archive_feed'),
     path('electronic/update-status/', views.update_equipment_status, name='update_equipment_status'),
     path('electronic/add-diagnosis/', views.add_diagnosis, name='add_diagnosis'),
     path('electronic/complete-repair/', views.complete_repair, name='complete_repair'),
 
     # API для добавления нового клиента
     path('api/add-client/', views.add_client, name='add_client'),
+    # API для поиска клиентов на форме акта приёмки
+    path('api/clients/search/', views.search_clients, name='search_clients'),
+    # API для поиска ранее принятого оборудования по номерам (повторный ремонт)
+    path('api/equipment/repeat-repairs/', views.repeat_repairs, name='repeat_repairs'),
+
+    # Полнотекстовый поиск по оборудованию, актам и клиентам
+    path('search/', views.search_view, name='search'),
+    path('api/search/', views.search_everything, name='search_everything'),
 
     # API для добавления категории, бренда и модели
     path('api/add-category/', views.add_category, name='add_category'),
     path('api/add-brand/', views.add_brand, name='add_brand'),
     path('api/add-model/', views.add_model, name='add_model'),
+
+    # API каталога для зависимых списков формы акта приёмки
+    path('api/catalog/brands/', views.catalog_brands, name='catalog_brands'),
+    path('api/catalog/models/', views.catalog_models, name='catalog_models'),
+    path('api/catalog/changes/', views.catalog_changes, name='catalog_changes'),
     # API для обновления гарантии оборудования
     path('api/update-equipment-guarantee/', views.update_equipment_guarantee, name='update_equipment_guarantee'),
     # API для обновления приоритета и статуса оборудования
     path('api/update-equipment-priority/', views.update_equipment_priority, name='update_equipment_priority'),
-    path('api/update-equipment-status/', views.update_equipment_status, name='update_equipment_status'),
+    path('api/update-equipment-status/', views.update_equipment_status_api, name='update_equipment_status_api'),
+    # Массовое изменение статуса, приоритета и гарантии
+    path('api/equipment/bulk-update/', views.bulk_update_equipment, name='bulk_update_equipment'),
 ]
\ No newline at end of file
@@ -7,17 +7,38 @@ from django.contrib.auth import login, authenticate
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib import messages
-from django.http import JsonResponse
-from django.views.decorators.http import require_POST
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+from django.utils.dateparse import parse_datetime
+from django.utils.http import parse_etags
+from django.utils.text import Truncator
+from django.views.decorators.http import require_GET, require_POST
 from django.views.decorators.csrf import csrf_exempt
 from django.db import transaction
 from django.utils import timezone
 
+from .catalog import get_brands_payload, get_catalog_changes, get_models_payload
 from .decorators import role_required
-from .models import UserRole, Client, EquipmentCategory, Brand, EquipmentModel, ReceptionAct, ReceivedEquipment
+from .exports import EXPORT_CHUNK_SIZE, EXPORT_CONTENT_TYPES, iterate_async, stream_csv, stream_xlsx
+from .filters import (
+    filter_acts, filter_equipment, filter_period, get_equipment_filters, get_period_filters, paginate_keyset,
+)
+from .reports import ROLLUP_GROUPS, status_duration_percentiles, turnaround_report
+from .roles import get_active_roles, has_role
+from .search import global_search
+from .models import (
+    ActNumberSequence, UserRole, Client, EquipmentCategory, Brand, EquipmentModel, ReceptionAct, ReceivedEquipment,
+    EquipmentEvent, EquipmentStatusCounter, EquipmentStatusTransition, DailyRollupRun,
+)
+import asyncio
 import json
+from collections import Counter
+from asgiref.sync import sync_to_async
 from datetime import timedelta
-from django.db.models import Count
+from django.db.models import Count, DateField, DurationField, ExpressionWrapper, F, Value
+from django.db.models.functions import TruncDate
 
 def login_view(request):
     """
@@ -25,11 +46,7 @@ def login_view(request):
     """
     if request.user.is_authenticated:
         # Проверяем, есть ли у пользователя роль Приёмщик
-        has_receiver_role = UserRole.objects.filter(
-            user=request.user,
-            role__name='Приёмщик',
-            is_active=True
-        ).exists()
+        has_receiver_role = has_role(request, 'Приёмщик')
 
         if has_receiver_role:
             return redirect('receiver_dashboard')
@@ -48,11 +65,7 @@ def login_view(request):
                 messages.success(request, f'Добро пожаловать, {username}!')
 
                 # Проверяем, есть ли у пользователя роль Приёмщик
-                has_receiver_role = UserRole.objects.filter(
-                    user=user,
-                    role__name='Приёмщик',
-                    is_active=True
-                ).exists()
+                has_receiver_role = 'Приёмщик' in get_active_roles(user)
 
                 if has_receiver_role:
                     return redirect('receiver_dashboard')
@@ -95,39 +108,60 @@ def home_view(request):
     return render(request, 'service_center/home.html')
 
 
-def generate_act_number():
+def generate_act_number(reserve=False):
     """
     Генерация номера акта в формате DDMMYYYY-XXXX.
     Где XXXX - последовательный номер акта в текущем году, начиная с 0001.
-    """
-    from django.utils import timezone
-    from .models import ReceptionAct
 
+    Порядковый номер берётся из счётчика ActNumberSequence за постоянное время.
+    При reserve=True номер резервируется атомарно (вызывать внутри transaction.atomic()),
+    иначе возвращается предполагаемый номер для отображения на форме.
+    """
     now = timezone.now()
-    current_year = now.year
     date_str = now.strftime('%d%m%Y')
 
-    # Ищем максимальный порядковый номер среди актов текущего года
-    acts_this_year = ReceptionAct.objects.filter(
-        created_at__year=current_year
-    )
+    if reserve:
+        new_serial = ActNumberSequence.next_value(now.year)
+    else:
+        new_serial = ActNumberSequence.peek(now.year)
 
-    max_serial = 0
-    for act in acts_this_year:
-        # Парсим номер акта: DDMMYYYY-XXXX
-        try:
-            parts = act.act_number.split('-')
-            if len(parts) == 2:
-                serial_part = parts[1]
-                serial_num = int(serial_part)
-                if serial_num > max_serial:
-                    max_serial = serial_num
-        except (ValueError, IndexError):
+    return f"{date_str}-{new_serial:04d}"
+
+
+def _collect_equipment_rows(data):
+    """
+    Разбирает строки оборудования из POST-данных формы акта приёмки.
+
+    Строки без выбранной модели (или с опцией "новая модель") пропускаются.
+
+    Returns:
+        list: Словари с полями оборудования и целочисленным model_id
+    """
+    try:
+        equipment_count = int(data.get('equipment_count', 0))
+    except (TypeError, ValueError):
+        raise ValueError("Некорректное количество оборудования")
+
+    rows = []
+    for i in range(equipment_count):
+        model_id = data.get(f'equipment_{i}_model')
+        if not model_id or model_id == 'new_model':
             continue
 
-    new_serial = max_serial + 1
+        try:
+            model_id = int(model_id)
+        except ValueError:
+            raise ValueError(f"Некорректная модель оборудования #{i + 1}")
+
+        rows.append({
+            'model_id': model_id,
+            'serial_number': data.get(f'equipment_{i}_serial_number', 'Без номера'),
+            'inventory_number': data.get(f'equipment_{i}_inventory_number', ''),
+            'guarantee_type': data.get(f'equipment_{i}_guarantee_type', 'NONE'),
+            'defect_description': data.get(f'equipment_{i}_defect_description', ''),
+        })
 
-    return f"{date_str}-{new_serial:04d}"
+    return rows
 
 
 @login_required
@@ -136,57 +170,55 @@ def create_reception_act(request):
     Страница для создания акта приёмки оборудования.
     """
     # Проверяем, есть ли у пользователя роль Приёмщик
-    has_receiver_role = UserRole.objects.filter(
-        user=request.user,
-        role__name='Приёмщик',
-        is_active=True
-    ).exists()
+    has_receiver_role = has_role(request, 'Приёмщик')
 
     if not has_receiver_role:
         messages.error(request, 'У вас нет прав для доступа к этой странице.')
         return redirect('receiver_dashboard')
 
-    # Генерация номера акта
-    act_number = generate_act_number()
-
-    # Получаем данные для формы
-    clients = Client.objects.all().order_by('short_name')
-    categories = EquipmentCategory.objects.all().order_by('name')
-
-    # Подготавливаем данные для зависимых списков
-    brands_by_category = {}
-    models_by_brand = {}
-
-    for category in categories:
-        brands_by_category[category.id] = list(
-            category.brands.all().order_by('name').values('id', 'name')
-        )
-
-    all_brands = Brand.objects.all().select_related('category')
-    for brand in all_brands:
-        models_by_brand[brand.id] = list(
-            brand.models.all().order_by('name').values('id', 'name')
-        )
-
     if request.method == 'POST':
         try:
+            data = request.POST
+
+            # Проверяем клиента и оборудование до начала записи в базу
+            client_id = data.get('client_id')
+            if not client_id:
+                raise ValueError("Клиент не выбран")
+            client = Client.objects.get(id=client_id)
+
+            equipment_rows = _collect_equipment_rows(data)
+            if not equipment_rows:
+                raise ValueError("Не добавлено ни одного оборудования")
+
+            # Все модели оборудования одним запросом
+            model_ids = {row['model_id'] for row in equipment_rows}
+            equipment_models = EquipmentModel.objects.select_related('category').in_bulk(model_ids)
+            missing_ids = model_ids - set(equipment_models)
+            if missing_ids:
+                raise ValueError(
+                    f"Модели оборудования не найдены: {', '.join(str(i) for i in sorted(missing_ids))}"
+                )
+
+            valid_guarantee_types = dict(ReceivedEquipment.GUARANTEE_CHOICES).keys()
+
             with transaction.atomic():
-                # Получаем данные из формы
-                data = request.POST
-                print("POST данные:", dict(data))  # Для отладки
-
-                # Обработка клиента
-                client_id = data.get('client_id')
-                if client_id:
-                    client = Client.objects.get(id=client_id)
-                    # Обновляем поля клиента
-                    client.contact_person = data.get('contact_person', '')
-                    client.phone = data.get('phone', '')
-                    client.email = data.get('email', '')
-                    client.save()
-                    print(f"Клиент обновлен: {client.short_name}")  # Для отладки
-                else:
-                    raise ValueError("Клиент не выбран")
+                # Обновляем контактные данные клиента, только если они изменились
+                contact_fields = {
+                    'contact_person': data.get('contact_person', ''),
+                    'phone': data.get('phone', ''),
+                    'email': data.get('email', ''),
+                }
+                changed_fields = [
+                    field for field, value in contact_fields.items()
+                    if getattr(client, field) != value
+                ]
+                if changed_fields:
+                    for field in changed_fields:
+                        setattr(client, field, contact_fields[field])
+                    client.save(update_fields=changed_fields)
+
+                # Резервируем номер акта в той же транзакции, что и сам акт
+                act_number = generate_act_number(reserve=True)
 
                 # Создаем акт приёмки
                 act = ReceptionAct.objects.create(
@@ -194,58 +226,58 @@ def create_reception_act(request):
                     client=client,
                     receiver=request.user
                 )
-                print(f"Акт создан: {act.act_number}")  # Для отладки
-
-                # Обработка оборудования
-                equipment_count = int(data.get('equipment_count', 0))
-                equipment_saved = False
-                print(f"Количество оборудования: {equipment_count}")  # Для отладки
-
-                for i in range(equipment_count):
-                    category_id = data.get(f'equipment_{i}_category')
-                    brand_id = data.get(f'equipment_{i}_brand')
-                    model_id = data.get(f'equipment_{i}_model')
-                    serial_number = data.get(f'equipment_{i}_serial_number', 'Без номера')
-                    inventory_number = data.get(f'equipment_{i}_inventory_number', '')
-                    guarantee_type = data.get(f'equipment_{i}_guarantee_type', 'NONE')
-                    defect_description = data.get(f'equipment_{i}_defect_description', '')
-
-                    print(
-                        f"Оборудование {i}: category={category_id}, brand={brand_id}, model={model_id}")  # Для отладки
-
-                    # Проверяем, что модель выбрана
-                    if model_id and model_id != '' and model_id != 'new_model':
-                        try:
-                            equipment_model = EquipmentModel.objects.get(id=model_id)
-
-                            ReceivedEquipment.objects.create(
-                                reception_act=act,
-                                model=equipment_model,
-                                serial_number=serial_number,
-                                inventory_number=inventory_number,
-                                defect_description=defect_description,
-                                guarantee_type=guarantee_type,
-                                status='WAITING',
-                                priority=0
-                            )
-                            equipment_saved = True
-                            print(f"Оборудование {i} сохранено: {equipment_model.name}")  # Для отладки
-                        except EquipmentModel.DoesNotExist:
-                            print(f"Ошибка: модель с ID {model_id} не найдена")
-                        except Exception as e:
-                            print(f"Ошибка при сохранении оборудования {i}: {str(e)}")
-
-                if not equipment_saved:
-                    raise ValueError("Не добавлено ни одного оборудования")
-
-                messages.success(request, f'Акт №{act_number} успешно создан!')
-                return redirect('receiver_dashboard')
 
+                # Сохраняем всё оборудование акта одним запросом
+                new_equipment = ReceivedEquipment.objects.bulk_create([
+                    ReceivedEquipment(
+                        reception_act=act,
+                        model=equipment_models[row['model_id']],
+                        # bulk_create не вызывает save(), цех заполняется здесь
+                        department=equipment_models[row['model_id']].category.department,
+                        serial_number=row['serial_number'],
+                        inventory_number=row['inventory_number'],
+                        # И поисковые поля номеров
+                        search_serial_number=ReceivedEquipment.normalize_number(row['serial_number']),
+                        search_inventory_number=ReceivedEquipment.normalize_number(row['inventory_number']),
+                        defect_description=row['defect_description'],
+                        guarantee_type=(
+                            row['guarantee_type'] if row['guarantee_type'] in valid_guarantee_types else 'NONE'
+                        ),
+                        status='WAITING',
+                        priority=0
+                    )
+                    for row in equipment_rows
+                ])
+
+                # bulk_create не вызывает save(), счётчики по цеху и статусу обновляются здесь
+                EquipmentStatusCounter.apply(Counter(
+                    (equipment.department, equipment.status) for equipment in new_equipment
+                ))
+
+                # И события для живого обновления панелей
+                EquipmentEvent.record(new_equipment, 'created')
+
+                # И начальные записи истории статусов
+                EquipmentStatusTransition.record(
+                    [(equipment.pk, '', equipment.status) for equipment in new_equipment],
+                    at=new_equipment[0].created_at if new_equipment else None
+                )
+
+            messages.success(request, f'Акт №{act_number} успешно создан!')
+            return redirect('receiver_dashboard')
+
+        except Client.DoesNotExist:
+            messages.error(request, 'Ошибка при сохранении акта: клиент не найден')
         except Exception as e:
-            print(f"Ошибка при сохранении акта: {str(e)}")  # Для отладки
             messages.error(request, f'Ошибка при сохранении акта: {str(e)}')
             # Возвращаем на ту же страницу с сохраненными данными
 
+    # Предварительный номер акта (окончательный выдаётся при сохранении)
+    act_number = generate_act_number()
+
+    # Получаем данные для формы (клиент выбирается через поиск)
+    categories = EquipmentCategory.objects.all().order_by('name')
+
     # Подготовка контекста для GET запроса
     month_names = {
         1: 'января', 2: 'февраля', 3: 'марта', 4: 'апреля',
@@ -260,15 +292,213 @@ def create_reception_act(request):
         'page_title': 'Создание акта приёмки',
         'act_number': act_number,
         'formatted_date': formatted_date,
-        'clients': clients,
         'categories': categories,
-        'brands_by_category': json.dumps(brands_by_category),
-        'models_by_brand': json.dumps(models_by_brand),
     }
 
     return render(request, 'service_center/create_reception_act.html', context)
 
 
+def _catalog_response(request, payload):
+    """
+    Ответ API каталога с сильным ETag.
+
+    Если ETag совпадает с If-None-Match, возвращается 304 без тела.
+    Cache-Control требует перепроверки, поэтому браузер хранит ответ,
+    но после изменения каталога сразу получает новые данные.
+    """
+    if payload['etag'] in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(payload['body'], content_type='application/json')
+
+    response['ETag'] = payload['etag']
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@login_required
+@require_GET
+def catalog_brands(request):
+    """
+    API endpoint со списком брендов категории для формы акта приёмки.
+    """
+    try:
+        category_id = int(request.GET.get('category', ''))
+    except ValueError:
+        return JsonResponse({
+            'success': False,
+            'error': 'Не указана категория'
+        }, status=400)
+
+    return _catalog_response(request, get_brands_payload(category_id))
+
+
+@login_required
+@require_GET
+def catalog_models(request):
+    """
+    API endpoint со списком моделей бренда для формы акта приёмки.
+    """
+    try:
+        brand_id = int(request.GET.get('brand', ''))
+    except ValueError:
+        return JsonResponse({
+            'success': False,
+            'error': 'Не указан бренд'
+        }, status=400)
+
+    return _catalog_response(request, get_models_payload(brand_id))
+
+
+@login_required
+@require_GET
+def catalog_changes(request):
+    """
+    API endpoint с изменениями каталога с момента последней синхронизации.
+
+    Параметр since - значение until из предыдущего ответа. Без него
+    (или при некорректном значении) возвращается весь каталог.
+    """
+    since = request.GET.get('since')
+    try:
+        since = parse_datetime(since) if since else None
+    except ValueError:
+        since = None
+
+    if since is not None and timezone.is_naive(since):
+        since = timezone.make_aware(since)
+
+    return JsonResponse({
+        'success': True,
+        **get_catalog_changes(since),
+    })
+
+
+@login_required
+@require_GET
+def search_clients(request):
+    """
+    API endpoint для поиска клиентов по началу наименования, ФИО или телефона.
+    """
+    query = request.GET.get('q', '')
+    try:
+        limit = min(max(int(request.GET.get('limit', 10)), 1), 50)
+    except ValueError:
+        limit = 10
+
+    clients = Client.search(query, limit=limit).values(
+        'id', 'short_name', 'full_name', 'contact_person', 'phone', 'email'
+    )
+
+    return JsonResponse({
+        'success': True,
+        'clients': list(clients)
+    })
+
+
+@login_required
+@require_GET
+def repeat_repairs(request):
+    """
+    API endpoint для формы акта приёмки: ранее принятое оборудование
+    с тем же серийным или инвентарным номером (повторный ремонт).
+
+    GET-параметры: serial_number, inventory_number.
+    """
+    serial_number = request.GET.get('serial_number', '')
+    inventory_number = request.GET.get('inventory_number', '')
+
+    equipment = ReceivedEquipment.find_by_numbers(serial_number, inventory_number).select_related(
+        'model__brand', 'reception_act__client'
+    )
+    serial = ReceivedEquipment.normalize_number(serial_number)
+    inventory = ReceivedEquipment.normalize_number(inventory_number)
+
+    items = []
+    for item in equipment:
+        matched_by = []
+        if serial and item.search_serial_number == serial:
+            matched_by.append('serial_number')
+        if inventory and item.search_inventory_number == inventory:
+            matched_by.append('inventory_number')
+        items.append({
+            'id': item.id,
+            'act_id': item.reception_act_id,
+            'act_number': item.reception_act.act_number,
+            'act_url': reverse('reception_act_detail', args=[item.reception_act_id]),
+            'act_date': timezone.localtime(item.reception_act.created_at).strftime('%d.%m.%Y'),
+            'client': item.reception_act.client.short_name,
+            'model': f'{item.model.brand.name} {item.model.name}',
+            'serial_number': item.serial_number,
+            'inventory_number': item.inventory_number,
+            'guarantee_type': item.guarantee_type,
+            'guarantee_display': item.get_guarantee_type_display(),
+            'status_display': item.get_status_display(),
+            'defect_description': item.defect_description or '',
+            'diagnosis_result': item.diagnosis_result or '',
+            'matched_by': matched_by,
+        })
+
+    return JsonResponse({
+        'success': True,
+        'equipment': items
+    })
+
+
+# Роли с доступом к полнотекстовому поиску
+SEARCH_ROLES = ('Координатор', 'Приёмщик')
+
+
+@login_required
+@require_GET
+def search_everything(request):
+    """
+    API endpoint полнотекстового поиска по оборудованию, актам и клиентам.
+
+    Доступен координатору и приёмщику (в результатах - контакты клиентов).
+    GET-параметры: q - текст поиска, limit - количество результатов (до 50).
+    """
+    if not has_role(request, *SEARCH_ROLES):
+        return JsonResponse({
+            'success': False,
+            'error': 'У вас нет прав для выполнения этой операции'
+        }, status=403)
+
+    query = request.GET.get('q', '')
+    try:
+        limit = min(max(int(request.GET.get('limit', 20)), 1), 50)
+    except ValueError:
+        limit = 20
+
+    results = global_search(query, limit=limit)
+    for result in results:
+        del result['snippet_parts']
+
+    return JsonResponse({
+        'success': True,
+        'results': results
+    })
+
+
+@login_required
+def search_view(request):
+    """
+    Страница поиска оборудования, актов и клиентов по номерам, наименованиям
+    и текстам диагностики и ремонта (координатор и приёмщик).
+    """
+    if not has_role(request, *SEARCH_ROLES):
+        messages.error(request, 'У вас нет прав для доступа к этой странице.')
+        return redirect('roles')
+
+    query = request.GET.get('q', '').strip()
+    context = {
+        'page_title': 'Поиск',
+        'search_query': query,
+        'results': global_search(query, limit=50) if query else [],
+    }
+    return render(request, 'service_center/search.html', context)
+
+
 @login_required
 @require_POST
 @csrf_exempt
@@ -490,11 +720,7 @@ def receiver_dashboard_view(request):
     Панель управления для приёмщика.
     """
     # Проверяем, есть ли у пользователя роль Приёмщик
-    has_receiver_role = UserRole.objects.filter(
-        user=request.user,
-        role__name='Приёмщик',
-        is_active=True
-    ).exists()
+    has_receiver_role = has_role(request, 'Приёмщик')
 
     if not has_receiver_role:
         messages.error(request, 'У вас нет прав для доступа к этой странице.')
@@ -532,11 +758,7 @@ def reception_act_detail(request, act_id):
     Детальный просмотр акта приёмки.
     """
     # Проверяем, есть ли у пользователя роль Приёмщик
-    has_receiver_role = UserRole.objects.filter(
-        user=request.user,
-        role__name='Приёмщик',
-        is_active=True
-    ).exists()
+    has_receiver_role = has_role(request, 'Приёмщик')
 
     if not has_receiver_role:
         messages.error(request, 'У вас нет прав для доступа к этой странице.')
@@ -566,39 +788,510 @@ def coordinator_dashboard_view(request):
     Панель управления для координатора.
     """
     # Проверяем, есть ли у пользователя роль Координатор
-    has_coordinator_role = UserRole.objects.filter(
-        user=request.user,
-        role__name='Координатор',
-        is_active=True
-    ).exists()
+    has_coordinator_role = has_role(request, 'Координатор')
 
     if not has_coordinator_role:
         messages.error(request, 'У вас нет прав для доступа к этой странице.')
         return redirect('roles')
 
-    # Получаем оборудование со всеми статусами кроме 'ISSUED' (выдано)
-    equipment_list = ReceivedEquipment.objects.exclude(
-        status='ISSUED'
-    ).select_related(
-        'reception_act__client',
-        'model__brand',
-        'model__category'
-    ).order_by('created_at')  # старые сверху
-
-    # Вычисляем количество дней в ремонте для каждого оборудования
-    today = timezone.now().date()
-    for equipment in equipment_list:
-        # Вычисляем разницу в днях между сегодняшней датой и датой создания записи
-        equipment.days_in_repair = (today - equipment.created_at.date()).days
-
+    # Строки таблицы загружаются страницами через coordinator_equipment_feed
     context = {
         'page_title': 'Панель координатора',
-        'equipment_list': equipment_list,
+        'filters': get_equipment_filters(request.GET),
+        'status_choices': ReceivedEquipment.STATUS_CHOICES,
+        'guarantee_choices': ReceivedEquipment.GUARANTEE_CHOICES,
+        'priority_choices': ReceivedEquipment.PRIORITY_CHOICES,
+        'department_choices': EquipmentCategory.DEPARTAMENT_CHOICES,
+        # Общий справочник подписей и цветов для отрисовки строк в браузере
+        'equipment_lookups': {
+            'status': [
+                [key, name, ReceivedEquipment.STATUS_COLORS.get(key, 'secondary')]
+                for key, name in ReceivedEquipment.STATUS_CHOICES
+            ],
+            'guarantee': [
+                [key, name, ReceivedEquipment.GUARANTEE_COLORS.get(key, 'secondary')]
+                for key, name in ReceivedEquipment.GUARANTEE_CHOICES
+            ],
+            'priority': [
+                [key, name, ReceivedEquipment.PRIORITY_COLORS.get(key, 'secondary')]
+                for key, name in ReceivedEquipment.PRIORITY_CHOICES
+            ],
+        },
     }
 
     return render(request, 'service_center/coordinator_dashboard.html', context)
 
 
+# Поля строки ленты оборудования координатора (порядок значений в rows)
+COORDINATOR_FEED_FIELDS = [
+    'id', 'act_date', 'act_number', 'client', 'phone', 'category', 'brand', 'model',
+    'serial_number', 'inventory_number', 'guarantee', 'priority', 'status', 'days', 'version',
+]
+
+
+@login_required
+@require_GET
+def coordinator_equipment_feed(request):
+    """
+    API endpoint с компактной лентой строк таблицы координатора.
+
+    Принимает те же фильтры, что и панель, и курсор страницы.
+    Строки - массивы значений в порядке COORDINATOR_FEED_FIELDS, статусы
+    и типы гарантии передаются кодами (подписи и цвета - в справочнике страницы).
+    """
+    if not has_role(request, 'Координатор'):
+        return JsonResponse({
+            'success': False,
+            'error': 'У вас нет прав для выполнения этой операции'
+        }, status=403)
+
+    filters = get_equipment_filters(request.GET)
+
+    # По умолчанию - оборудование со всеми статусами кроме 'ISSUED' (выдано)
+    equipment_list = ReceivedEquipment.objects.all()
+    if 'status' not in filters:
+        equipment_list = equipment_list.exclude(status='ISSUED')
+    equipment_list = filter_equipment(equipment_list, filters).annotate(
+        # Срок в ремонте считается в базе: сегодняшняя дата минус дата приёмки
+        repair_duration=ExpressionWrapper(
+            Value(timezone.localdate(), output_field=DateField()) - TruncDate('created_at'),
+            output_field=DurationField()
+        )
+    ).values(
+        'id', 'created_at',
+        'reception_act__created_at', 'reception_act__act_number',
+        'reception_act__client__short_name', 'reception_act__client__phone',
+        'model__category__name', 'model__brand__name', 'model__name',
+        'serial_number', 'inventory_number', 'guarantee_type', 'priority', 'status',
+        'repair_duration', 'version',
+    )
+
+    # Страница по курсору, старые сверху
+    equipment_page, next_cursor = paginate_keyset(equipment_list, request.GET.get('cursor'))
+
+    rows = [
+        [
+            equipment['id'],
+            timezone.localtime(equipment['reception_act__created_at']).strftime('%d.%m.%Y'),
+            equipment['reception_act__act_number'],
+            equipment['reception_act__client__short_name'],
+            equipment['reception_act__client__phone'],
+            equipment['model__category__name'],
+            equipment['model__brand__name'],
+            equipment['model__name'],
+            equipment['serial_number'],
+            equipment['inventory_number'],
+            equipment['guarantee_type'],
+            equipment['priority'],
+            equipment['status'],
+            equipment['repair_duration'].days,
+            equipment['version'],
+        ]
+        for equipment in equipment_page
+    ]
+
+    return JsonResponse({
+        'success': True,
+        'fields': COORDINATOR_FEED_FIELDS,
+        'rows': rows,
+        'next_cursor': next_cursor,
+    }, json_dumps_params={'ensure_ascii': False, 'separators': (',', ':')})
+
+
+def _parse_version(value):
+    """
+    Версия записи из запроса или None, если не передана или некорректна
+    (тогда сохранение выполняется без проверки версии).
+    """
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _version_conflict_response(equipment_id, error):
+    """
+    Ответ 409 при одновременном изменении: текущие значения оборудования,
+    чтобы страница показала их вместо устаревших.
+    """
+    equipment = ReceivedEquipment.objects.filter(id=equipment_id).first()
+    return JsonResponse({
+        'success': False,
+        'error': error,
+        'equipment': EquipmentEvent.snapshot(equipment) if equipment else None,
+    }, status=409)
+
+
+@login_required
+@require_GET
+def equipment_counters(request):
+    """
+    API endpoint с количеством оборудования по цехам и статусам.
+
+    Читает только таблицу счётчиков EquipmentStatusCounter,
+    таблица оборудования не просматривается.
+    """
+    if not has_role(request, 'Координатор'):
+        return JsonResponse({
+            'success': False,
+            'error': 'У вас нет прав для выполнения этой операции'
+        }, status=403)
+
+    counters = EquipmentStatusCounter.as_dict()
+    return JsonResponse({
+        'success': True,
+        'counters': counters,
+        'total': sum(sum(statuses.values()) for statuses in counters.values()),
+    })
+
+
+@login_required
+@require_GET
+def status_durations_report(request):
+    """
+    API endpoint с процентилями времени пребывания оборудования в статусах.
+
+    GET-параметры: days - период в днях (по умолчанию 90, не больше 365),
+    department - цех. Время в ответе - в секундах.
+    """
+    if not has_role(request, 'Координатор'):
+        return JsonResponse({
+            'success': False,
+            'error': 'У вас нет прав для выполнения этой операции'
+        }, status=403)
+
+    try:
+        days = min(max(int(request.GET.get('days', 90)), 1), 365)
+    except (TypeError, ValueError):
+        days = 90
+    department = request.GET.get('department')
+    if department not in dict(EquipmentCategory.DEPARTAMENT_CHOICES):
+        department = None
+
+    return JsonResponse({
+        'success': True,
+        'days': days,
+        'department': department,
+        'statuses': status_duration_percentiles(days=days, department=department),
+    })
+
+
+@login_required
+def turnaround_report_view(request):
+    """
+    Отчёт руководителя по приёмке, выдаче и срокам ремонта за период.
+
+    Читает только суточные итоги (команда build_daily_rollups), поэтому
+    не зависит от объёма таблицы оборудования.
+    GET-параметры: date_from, date_to (по умолчанию - последние 30 дней), group_by.
+    """
+    if not has_role(request, 'Координатор'):
+        messages.error(request, 'У вас нет прав для доступа к этой странице.')
+        return redirect('roles')
+
+    period = get_period_filters(request.GET)
+    date_to = period.get('date_to') or timezone.localdate()
+    date_from = period.get('date_from') or date_to - timedelta(days=29)
+    if date_from > date_to:
+        date_from, date_to = date_to, date_from
+
+    group_by = request.GET.get('group_by')
+    if group_by not in ROLLUP_GROUPS:
+        group_by = 'department'
+
+    rows = turnaround_report(date_from, date_to, group_by)
+
+    context = {
+        'page_title': 'Сроки ремонта',
+        'date_from': date_from,
+        'date_to': date_to,
+        'group_by': group_by,
+        'group_choices': ROLLUP_GROUPS.items(),
+        'group_name': ROLLUP_GROUPS[group_by],
+        'rows': rows,
+        'totals': {
+            'received': sum(row['received'] for row in rows),
+            'issued': sum(row['issued'] for row in rows),
+            'estimated_cost_total': sum(row['estimated_cost_total'] for row in rows),
+        },
+        'last_run': DailyRollupRun.objects.filter(finished_at__isnull=False).first(),
+    }
+    return render(request, 'service_center/turnaround_report.html', context)
+
+
+# Столбцы выгрузки оборудования: поле values_list() и заголовок
+EQUIPMENT_EXPORT_COLUMNS = [
+    ('id', 'ID'),
+    ('reception_act__act_number', 'Номер акта'),
+    ('reception_act__created_at', 'Дата акта'),
+    ('reception_act__client__short_name', 'Клиент'),
+    ('reception_act__client__full_name', 'Полное наименование клиента'),
+    ('model__category__name', 'Категория'),
+    ('model__brand__name', 'Бренд'),
+    ('model__name', 'Модель'),
+    ('serial_number', 'Серийный номер'),
+    ('inventory_number', 'Инвентарный номер'),
+    ('department', 'Цех'),
+    ('guarantee_type', 'Гарантия'),
+    ('status', 'Статус'),
+    ('priority', 'Приоритет'),
+    ('estimated_cost', 'Примерная стоимость'),
+    ('created_at', 'Дата приёмки'),
+    ('updated_at', 'Дата изменения'),
+]
+
+# Столбцы выгрузки актов приёмки
+ACT_EXPORT_COLUMNS = [
+    ('act_number', 'Номер акта'),
+    ('created_at', 'Дата акта'),
+    ('client__short_name', 'Клиент'),
+    ('client__full_name', 'Полное наименование клиента'),
+    ('client__contact_person', 'Ответственное лицо'),
+    ('client__phone', 'Телефон'),
+    ('receiver__username', 'Приёмщик'),
+    ('equipment_count', 'Единиц оборудования'),
+    ('printed_at', 'Дата печати'),
+]
+
+
+def _export_datetime(value):
+    """
+    Дата и время для выгрузки в местном часовом поясе.
+    """
+    return timezone.localtime(value).strftime('%d.%m.%Y %H:%M') if value else ''
+
+
+def _export_response(request, columns, rows, filename, sheet_name):
+    """
+    Потоковый ответ с выгрузкой в формате из GET-параметра format (csv или xlsx).
+
+    Args:
+        request: Объект запроса
+        columns (list): Столбцы (поле, заголовок)
+        rows (iterable): Строки значений (генератор по QuerySet.iterator())
+        filename (str): Имя файла без расширения
+        sheet_name (str): Название листа XLSX
+
+    Returns:
+        StreamingHttpResponse: Ответ с файлом
+    """
+    export_format = request.GET.get('format')
+    if export_format not in EXPORT_CONTENT_TYPES:
+        export_format = 'csv'
+
+    header = [title for _, title in columns]
+    if export_format == 'xlsx':
+        content = stream_xlsx(header, rows, sheet_name)
+    else:
+        content = stream_csv(header, rows)
+    if isinstance(request, ASGIRequest):
+        # Синхронный генератор ASGI-обработчик сначала прочитал бы целиком
+        content = iterate_async(content)
+
+    response = StreamingHttpResponse(content, content_type=EXPORT_CONTENT_TYPES[export_format])
+    response['Content-Disposition'] = (
+        f'attachment; filename="{filename}-{timezone.localdate():%Y-%m-%d}.{export_format}"'
+    )
+    return response
+
+
+@login_required
+@require_GET
+def export_equipment(request):
+    """
+    Выгрузка оборудования в CSV или XLSX.
+
+    Принимает фильтры панели координатора и период приёмки (date_from, date_to).
+    В отличие от панели, без фильтра статуса выгружается и выданное оборудование.
+    Строки читаются из базы частями плоской выборкой с JOIN к акту, клиенту,
+    модели, бренду и категории и сразу отдаются клиенту.
+    """
+    if not has_role(request, 'Координатор'):
+        return JsonResponse({
+            'success': False,
+            'error': 'У вас нет прав для выполнения этой операции'
+        }, status=403)
+
+    equipment_list = filter_equipment(ReceivedEquipment.objects.all(), get_equipment_filters(request.GET))
+    equipment_list = filter_period(equipment_list, get_period_filters(request.GET)).order_by(
+        'created_at', 'id'
+    ).values_list(*[field for field, _ in EQUIPMENT_EXPORT_COLUMNS])
+
+    departments = dict(EquipmentCategory.DEPARTAMENT_CHOICES)
+    guarantees = dict(ReceivedEquipment.GUARANTEE_CHOICES)
+    statuses = dict(ReceivedEquipment.STATUS_CHOICES)
+    priorities = dict(ReceivedEquipment.PRIORITY_CHOICES)
+
+    def rows():
+        for (equipment_id, act_number, act_date, client, client_full_name, category, brand, model,
+             serial_number, inventory_number, department, guarantee_type, status, priority,
+             estimated_cost, created_at, updated_at) in equipment_list.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            yield [
+                equipment_id, act_number, _export_datetime(act_date), client, client_full_name,
+                category, brand, model, serial_number, inventory_number or '',
+                departments.get(department, department), guarantees.get(guarantee_type, guarantee_type),
+                statuses.get(status, status), priorities.get(priority, priority),
+                estimated_cost, _export_datetime(created_at), _export_datetime(updated_at),
+            ]
+
+    return _export_response(request, EQUIPMENT_EXPORT_COLUMNS, rows(), 'equipment', 'Оборудование')
+
+
+@login_required
+@require_GET
+def export_reception_acts(request):
+    """
+    Выгрузка актов приёмки в CSV или XLSX.
+
+    Принимает фильтр клиента панели (client) и период (date_from, date_to).
+    Количество оборудования считается в той же выборке (GROUP BY).
+    """
+    if not has_role(request, 'Координатор', 'Приёмщик'):
+        return JsonResponse({
+            'success': False,
+            'error': 'У вас нет прав для выполнения этой операции'
+        }, status=403)
+
+    filters = {**get_equipment_filters(request.GET), **get_period_filters(request.GET)}
+    acts = filter_acts(ReceptionAct.objects.all(), filters).annotate(
+        equipment_count=Count('equipments')
+    ).order_by('created_at', 'id').values_list(*[field for field, _ in ACT_EXPORT_COLUMNS])
+
+    def rows():
+        for (act_number, created_at, client, client_full_name, contact_person, phone,
+             receiver, equipment_count, printed_at) in acts.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            yield [
+                act_number, _export_datetime(created_at), client, client_full_name, contact_person, phone,
+                receiver, equipment_count, _export_datetime(printed_at),
+            ]
+
+    return _export_response(request, ACT_EXPORT_COLUMNS, rows(), 'reception-acts', 'Акты приёмки')
+
+
+# Поток событий оборудования (SSE): период опроса журнала, интервал пустых
+# сообщений для поддержания соединения и время жизни одного подключения
+# (после него браузер переподключается сам с заголовком Last-Event-ID)
+EQUIPMENT_EVENTS_POLL_INTERVAL = 1
+EQUIPMENT_EVENTS_HEARTBEAT = 15
+EQUIPMENT_EVENTS_STREAM_LIFETIME = 60 * 5
+EQUIPMENT_EVENTS_BATCH_SIZE = 100
+
+# Пауза перед переподключением браузера, мс: под ASGI - после обрыва потока,
+# под WSGI - период опроса (каждый ответ отдаёт накопленные события и закрывается)
+EQUIPMENT_EVENTS_RETRY = 3000
+EQUIPMENT_EVENTS_WSGI_RETRY = 5000
+
+
+async def _equipment_event_messages(last_event_id, department=None):
+    """
+    Очередная порция событий журнала EquipmentEvent в формате SSE.
+
+    Args:
+        last_event_id (int): ID последнего полученного клиентом события
+        department (str): Цех, события которого нужны (None - все цеха)
+
+    Returns:
+        tuple: (list сообщений SSE, ID последнего просмотренного события,
+            количество просмотренных событий)
+    """
+    events = EquipmentEvent.objects.filter(
+        id__gt=last_event_id
+    ).order_by('id').values_list('id', 'kind', 'payload')[:EQUIPMENT_EVENTS_BATCH_SIZE]
+
+    messages_list = []
+    received = 0
+    async for event_id, kind, payload in events:
+        received += 1
+        last_event_id = event_id
+        # Перевод в другой цех нужен и панели прежнего цеха (чтобы убрать строку)
+        if department is not None and department not in (payload.get('department'),
+                                                          payload.get('previous_department')):
+            continue
+        data = json.dumps(dict(payload, kind=kind), ensure_ascii=False, separators=(',', ':'))
+        messages_list.append(f'id: {event_id}\nevent: equipment\ndata: {data}\n\n')
+    return messages_list, last_event_id, received
+
+
+async def _equipment_event_stream(last_event_id, department=None):
+    """
+    Поток событий журнала EquipmentEvent в формате text/event-stream (ASGI).
+
+    Args:
+        last_event_id (int): ID последнего полученного клиентом события
+        department (str): Цех, события которого нужны (None - все цеха)
+
+    Yields:
+        str: Сообщения SSE
+    """
+    loop = asyncio.get_running_loop()
+    started_at = last_sent_at = loop.time()
+
+    # ID сразу: при переподключении без новых событий браузер продолжит с этого места
+    yield f'retry: {EQUIPMENT_EVENTS_RETRY}\nid: {last_event_id}\n\n'
+
+    while loop.time() - started_at < EQUIPMENT_EVENTS_STREAM_LIFETIME:
+        messages_list, last_event_id, received = await _equipment_event_messages(last_event_id, department)
+        for message in messages_list:
+            yield message
+            last_sent_at = loop.time()
+
+        if received < EQUIPMENT_EVENTS_BATCH_SIZE:
+            await asyncio.sleep(EQUIPMENT_EVENTS_POLL_INTERVAL)
+
+        if loop.time() - last_sent_at >= EQUIPMENT_EVENTS_HEARTBEAT:
+            # Пропущенные другими цехами события не отправлялись: ID сдвигается здесь
+            yield f'id: {last_event_id}\n\n'
+            last_sent_at = loop.time()
+
+
+@login_required
+async def equipment_events(request):
+    """
+    Поток изменений оборудования для живого обновления панелей (Server-Sent Events).
+
+    Под ASGI (ServiceHub/asgi.py) соединение держится открытым и не занимает
+    рабочий поток. Под WSGI (runserver, ServiceHub/wsgi.py) открытое
+    соединение заняло бы поток на всё время жизни потока, поэтому ответ
+    отдаёт накопленные события и закрывается, а браузер переподключается
+    через EQUIPMENT_EVENTS_WSGI_RETRY мс - EventSource работает как опрос.
+
+    Электронщик без роли координатора получает только события цеха электроники.
+    """
+    roles = await sync_to_async(get_active_roles)(await request.auser())
+    if 'Координатор' in roles:
+        department = None
+    elif 'Электронщик' in roles:
+        department = 'ELECTRON'
+    else:
+        return JsonResponse({
+            'success': False,
+            'error': 'У вас нет прав для выполнения этой операции'
+        }, status=403)
+
+    # При переподключении браузер передаёт ID последнего полученного события
+    try:
+        last_event_id = int(request.headers.get('Last-Event-ID') or request.GET['last_event_id'])
+    except (KeyError, ValueError):
+        # Новое подключение: только события после текущего момента
+        last_event_id = await EquipmentEvent.objects.order_by('-id').values_list('id', flat=True).afirst() or 0
+
+    if isinstance(request, ASGIRequest):
+        response = StreamingHttpResponse(
+            _equipment_event_stream(last_event_id, department),
+            content_type='text/event-stream'
+        )
+    else:
+        messages_list, last_event_id, _ = await _equipment_event_messages(last_event_id, department)
+        response = HttpResponse(
+            f'retry: {EQUIPMENT_EVENTS_WSGI_RETRY}\n\n' + ''.join(messages_list) + f'id: {last_event_id}\n\n',
+            content_type='text/event-stream'
+        )
+    response['Cache-Control'] = 'no-cache'
+    # Отключает буферизацию потока в nginx
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @login_required
 @require_POST
 @csrf_exempt
@@ -617,18 +1310,14 @@ def update_equipment_priority(request):
                 'error': 'Не указано оборудование'
             })
 
-        if priority not in [0, 1, 3]:  # Разрешённые значения приоритета
+        if priority not in dict(ReceivedEquipment.PRIORITY_CHOICES):  # Разрешённые значения приоритета
             return JsonResponse({
                 'success': False,
                 'error': 'Недопустимое значение приоритета'
             })
 
         # Проверяем, есть ли у пользователя роль Координатор
-        has_coordinator_role = UserRole.objects.filter(
-            user=request.user,
-            role__name='Координатор',
-            is_active=True
-        ).exists()
+        has_coordinator_role = has_role(request, 'Координатор')
 
         if not has_coordinator_role:
             return JsonResponse({
@@ -638,13 +1327,16 @@ def update_equipment_priority(request):
 
         equipment = ReceivedEquipment.objects.get(id=equipment_id)
         equipment.priority = priority
-        equipment.save()
+        equipment.save(update_fields=['priority'], expected_version=_parse_version(data.get('version')))
 
         return JsonResponse({
             'success': True,
-            'message': 'Приоритет обновлён'
+            'message': 'Приоритет обновлён',
+            'version': equipment.version
         })
 
+    except ReceivedEquipment.VersionConflict as e:
+        return _version_conflict_response(equipment_id, str(e))
     except ReceivedEquipment.DoesNotExist:
         return JsonResponse({
             'success': False,
@@ -660,9 +1352,9 @@ def update_equipment_priority(request):
 @login_required
 @require_POST
 @csrf_exempt
-def update_equipment_status(request):
+def update_equipment_status_api(request):
     """
-    API endpoint для обновления статуса оборудования.
+    API endpoint для обновления статуса оборудования (панель координатора).
     """
     try:
         data = json.loads(request.body)
@@ -676,11 +1368,7 @@ def update_equipment_status(request):
             })
 
         # Проверяем, есть ли у пользователя роль Координатор
-        has_coordinator_role = UserRole.objects.filter(
-            user=request.user,
-            role__name='Координатор',
-            is_active=True
-        ).exists()
+        has_coordinator_role = has_role(request, 'Координатор')
 
         if not has_coordinator_role:
             return JsonResponse({
@@ -699,13 +1387,16 @@ def update_equipment_status(request):
             })
 
         equipment.status = status
-        equipment.save()
+        equipment.save(update_fields=['status'], expected_version=_parse_version(data.get('version')))
 
         return JsonResponse({
             'success': True,
-            'message': 'Статус обновлён'
+            'message': 'Статус обновлён',
+            'version': equipment.version
         })
 
+    except ReceivedEquipment.VersionConflict as e:
+        return _version_conflict_response(equipment_id, str(e))
     except ReceivedEquipment.DoesNotExist:
         return JsonResponse({
             'success': False,
@@ -737,11 +1428,7 @@ def update_equipment_guarantee(request):
             })
 
         # Проверяем, есть ли у пользователя роль Координатор
-        has_coordinator_role = UserRole.objects.filter(
-            user=request.user,
-            role__name='Координатор',
-            is_active=True
-        ).exists()
+        has_coordinator_role = has_role(request, 'Координатор')
 
         if not has_coordinator_role:
             return JsonResponse({
@@ -760,13 +1447,16 @@ def update_equipment_guarantee(request):
             })
 
         equipment.guarantee_type = guarantee_type
-        equipment.save()
+        equipment.save(update_fields=['guarantee_type'], expected_version=_parse_version(data.get('version')))
 
         return JsonResponse({
             'success': True,
-            'message': 'Тип гарантии обновлён'
+            'message': 'Тип гарантии обновлён',
+            'version': equipment.version
         })
 
+    except ReceivedEquipment.VersionConflict as e:
+        return _version_conflict_response(equipment_id, str(e))
     except ReceivedEquipment.DoesNotExist:
         return JsonResponse({
             'success': False,
@@ -779,50 +1469,322 @@ def update_equipment_guarantee(request):
         })
 
 
+# Поля оборудования, которые координатор меняет массово, и проверка их значений
+BULK_EQUIPMENT_FIELDS = {
+    'status': lambda value: isinstance(value, str) and value in dict(ReceivedEquipment.STATUS_CHOICES),
+    'priority': lambda value: (
+        type(value) is int and value in dict(ReceivedEquipment.PRIORITY_CHOICES)
+    ),
+    'guarantee_type': lambda value: isinstance(value, str) and value in dict(ReceivedEquipment.GUARANTEE_CHOICES),
+}
+
+# Максимальное количество оборудования в одном массовом изменении
+BULK_EQUIPMENT_LIMIT = 500
+
+
+def _parse_equipment_changes(items):
+    """
+    Проверяет список изменений оборудования из запроса.
+
+    Ошибки отдельных изменений собираются по ID оборудования, чтобы
+    страница могла показать их в нужных строках.
+
+    Args:
+        items (list): Элементы вида {"id": 1, "status": "REPAIR", "priority": 1, "version": 3};
+            version - версия, которую видел пользователь (необязательно)
+
+    Returns:
+        tuple: ({ID оборудования: {поле: значение}}, {ID оборудования: версия},
+            {ID оборудования: текст ошибки})
+
+    Raises:
+        ValueError: Если список некорректен целиком
+    """
+    if not isinstance(items, list) or not items:
+        raise ValueError("Не указаны изменения")
+    if len(items) > BULK_EQUIPMENT_LIMIT:
+        raise ValueError(f"Не больше {BULK_EQUIPMENT_LIMIT} единиц оборудования за один запрос")
+
+    changes = {}
+    versions = {}
+    errors = {}
+    for item in items:
+        try:
+            equipment_id = int(item.get('id'))
+        except (AttributeError, TypeError, ValueError):
+            raise ValueError("Не указано оборудование")
+
+        fields = {field: value for field, value in item.items() if field not in ('id', 'version')}
+        if not fields:
+            errors[equipment_id] = "Нет изменений"
+            continue
+        for field, value in fields.items():
+            if field not in BULK_EQUIPMENT_FIELDS:
+                errors[equipment_id] = f"Поле {field} нельзя изменить"
+                break
+            if not BULK_EQUIPMENT_FIELDS[field](value):
+                errors[equipment_id] = f"Недопустимое значение поля {field}"
+                break
+        else:
+            # Повторные изменения одного оборудования объединяются (последнее значение важнее)
+            changes.setdefault(equipment_id, {}).update(fields)
+            version = _parse_version(item.get('version'))
+            if version is not None:
+                versions[equipment_id] = version
+
+    return changes, versions, errors
+
+
+def _apply_equipment_changes(changes, versions):
+    """
+    Применяет изменения оборудования сгруппированными UPDATE в одной транзакции.
+
+    Оборудование с одинаковым набором изменений и одинаковой ожидаемой версией
+    обновляется одним запросом (UPDATE ... WHERE id IN (...) AND version = n).
+    QuerySet.update() не вызывает save() и сигналы, поэтому версия, счётчики
+    по цеху и статусу, история статусов и журнал событий обновляются здесь же.
+    Если часть оборудования не найдена или изменена другим пользователем,
+    ничего не изменяется.
+
+    Args:
+        changes (dict): Изменения из _parse_equipment_changes()
+        versions (dict): Ожидаемые версии из _parse_equipment_changes()
+
+    Returns:
+        tuple: (set ID ненайденного оборудования, list изменённого другими оборудования,
+            dict новых версий по ID); при ошибке версии пустые
+    """
+    with transaction.atomic():
+        current = {
+            row['id']: row for row in ReceivedEquipment.objects.select_for_update().filter(
+                id__in=changes
+            ).values('id', 'department', 'status', 'version')
+        }
+        missing_ids = set(changes) - set(current)
+        if missing_ids:
+            return missing_ids, [], {}
+
+        stale_ids = [
+            equipment_id for equipment_id, version in versions.items()
+            if current[equipment_id]['version'] != version
+        ]
+        if stale_ids:
+            return set(), list(ReceivedEquipment.objects.filter(id__in=stale_ids).order_by('id')), {}
+
+        groups = {}
+        for equipment_id, fields in changes.items():
+            key = (tuple(sorted(fields.items())), versions.get(equipment_id))
+            groups.setdefault(key, []).append(equipment_id)
+
+        now = timezone.now()
+        for (fields, version), equipment_ids in groups.items():
+            queryset = ReceivedEquipment.objects.filter(id__in=equipment_ids)
+            if version is not None:
+                queryset = queryset.filter(version=version)
+            updated = queryset.update(updated_at=now, version=F('version') + 1, **dict(fields))
+            if updated != len(equipment_ids):
+                # Запись изменили между проверкой и UPDATE: откат всех изменений
+                transaction.set_rollback(True)
+                stale_ids = [
+                    equipment_id for equipment_id, current_version in ReceivedEquipment.objects.filter(
+                        id__in=versions
+                    ).values_list('id', 'version')
+                    if current_version != versions[equipment_id] + 1
+                ]
+                return set(), list(ReceivedEquipment.objects.filter(id__in=stale_ids).order_by('id')), {}
+
+        counter_changes = Counter()
+        transitions = []
+        for equipment_id, fields in changes.items():
+            row = current[equipment_id]
+            if 'status' in fields and fields['status'] != row['status']:
+                counter_changes[(row['department'], row['status'])] -= 1
+                counter_changes[(row['department'], fields['status'])] += 1
+                transitions.append((equipment_id, row['status'], fields['status']))
+        EquipmentStatusCounter.apply(counter_changes)
+        EquipmentStatusTransition.record(transitions, at=now)
+
+        updated_equipment = list(ReceivedEquipment.objects.filter(id__in=changes).order_by('id'))
+        EquipmentEvent.record(updated_equipment, 'updated')
+
+    return set(), [], {equipment.pk: equipment.version for equipment in updated_equipment}
+
+
+@login_required
+@require_POST
+def bulk_update_equipment(request):
+    """
+    API endpoint для массового изменения статуса, приоритета и гарантии оборудования.
+
+    Принимает {"changes": [{"id": 1, "priority": 1, "version": 3}, {"id": 2, "status": "REPAIR"}, ...]}.
+    Изменения применяются все вместе или не применяются совсем; при ошибках
+    в ответе есть errors - тексты ошибок по ID оборудования. Если оборудование
+    изменено после того, как пользователь увидел версию, ответ 409 с текущими
+    данными этого оборудования в conflicts.
+    """
+    if not has_role(request, 'Координатор'):
+        return JsonResponse({
+            'success': False,
+            'error': 'У вас нет прав для выполнения этой операции'
+        }, status=403)
+
+    try:
+        data = json.loads(request.body)
+        changes, versions, errors = _parse_equipment_changes(data.get('changes') if isinstance(data, dict) else None)
+    except json.JSONDecodeError:
+        return JsonResponse({
+            'success': False,
+            'error': 'Некорректные данные запроса'
+        }, status=400)
+    except ValueError as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=400)
+
+    if errors:
+        return JsonResponse({
+            'success': False,
+            'error': 'Изменения не сохранены: есть недопустимые значения',
+            'errors': errors,
+        }, status=400)
+
+    missing_ids, stale_equipment, new_versions = _apply_equipment_changes(changes, versions)
+    if missing_ids:
+        return JsonResponse({
+            'success': False,
+            'error': 'Изменения не сохранены: оборудование не найдено',
+            'errors': {equipment_id: 'Оборудование не найдено' for equipment_id in missing_ids},
+        }, status=404)
+
+    if stale_equipment:
+        return JsonResponse({
+            'success': False,
+            'error': 'Изменения не сохранены: оборудование изменено другим пользователем',
+            'errors': {equipment.pk: 'Изменено другим пользователем' for equipment in stale_equipment},
+            'conflicts': {equipment.pk: EquipmentEvent.snapshot(equipment) for equipment in stale_equipment},
+        }, status=409)
+
+    return JsonResponse({
+        'success': True,
+        'updated': len(changes),
+        'versions': new_versions,
+        'message': 'Изменения сохранены'
+    })
+
+
 def workshop_dashboard_view(request):
     return render(request, 'service_center/repair.html', {})
 
 
+# Статусы оборудования на рабочих вкладках панели электронщика
+ELECTRONIC_ACTIVE_STATUSES = ['WAITING', 'DIAGNOSIS', 'REPAIR']
+
+# Статусы оборудования во вкладке "Архив"
+ELECTRONIC_ARCHIVE_STATUSES = ['DIAGNOSED', 'TESTING', 'READY', 'ISSUED']
+
+
+def _electronic_equipment():
+    """
+    Оборудование цеха электроники со всеми данными, которые выводят
+    вкладки панели (акт, клиент, модель, специалист).
+    """
+    return ReceivedEquipment.objects.filter(
+        department='ELECTRON'
+    ).select_related(
+        'reception_act__client',
+        'model__brand',
+        'model__category',
+        'assigned_specialist__user',
+    )
+
+
+def _electronic_archive_page(cursor):
+    """
+    Страница архива цеха электроники: от недавно изменённых к старым.
+
+    Args:
+        cursor (str): Курсор предыдущей страницы или None для первой
+
+    Returns:
+        tuple: (list оборудования, курсор следующей страницы или None)
+    """
+    archive_equipment = _electronic_equipment().filter(status__in=ELECTRONIC_ARCHIVE_STATUSES)
+    return paginate_keyset(archive_equipment, cursor, time_field='updated_at', descending=True)
+
+
+def _archive_work_summary(equipment):
+    """
+    Краткое описание выполненных работ для строки архива.
+    """
+    if equipment.repair_notes:
+        return Truncator(equipment.repair_notes).chars(100)
+    if equipment.diagnosis_result:
+        return 'Диагностика'
+    return '---'
+
+
 @login_required
 @role_required('Электронщик')
 def electronic_dashboard(request):
-    # Получаем категории электронного цеха
-    electronic_categories = EquipmentCategory.objects.filter(department='ELECTRON')
-
-    # Оборудование для вкладки "Главная"
-    main_equipment = ReceivedEquipment.objects.filter(
-        model__category__in=electronic_categories,
-        status__in=['WAITING', 'DIAGNOSIS', 'REPAIR']
-    ).order_by('created_at')  # Сортировка сверху старые
-
-    # Оборудование для вкладки "Диагностика"
-    diag_equipment = ReceivedEquipment.objects.filter(
-        model__category__in=electronic_categories,
-        status='DIAGNOSIS'
-    ).order_by('created_at')
-
-    # Оборудование для вкладки "Ремонт"
-    repair_equipment = ReceivedEquipment.objects.filter(
-        model__category__in=electronic_categories,
-        status='REPAIR'
-    ).order_by('created_at')
-
-    # Оборудование для вкладки "Архив"
-    archive_equipment = ReceivedEquipment.objects.filter(
-        model__category__in=electronic_categories,
-        status__in=['DIAGNOSED', 'TESTING', 'READY', 'ISSUED']
-    ).order_by('-updated_at')
+    # Рабочее оборудование цеха одним запросом, сверху старые
+    active_equipment = list(
+        _electronic_equipment().filter(
+            status__in=ELECTRONIC_ACTIVE_STATUSES
+        ).order_by('created_at')
+    )
+
+    # Вкладки "Главная", "Диагностика" и "Ремонт" - срезы по статусу в памяти
+    main_equipment = active_equipment
+    diag_equipment = [equipment for equipment in active_equipment if equipment.status == 'DIAGNOSIS']
+    repair_equipment = [equipment for equipment in active_equipment if equipment.status == 'REPAIR']
+
+    # Вкладка "Архив": первая страница, остальные догружаются через electronic_archive_feed
+    archive_equipment, archive_next_cursor = _electronic_archive_page(None)
 
     context = {
         'main_equipment': main_equipment,
         'diag_equipment': diag_equipment,
         'repair_equipment': repair_equipment,
         'archive_equipment': archive_equipment,
+        'archive_next_cursor': archive_next_cursor,
     }
 
     return render(request, 'service_center/electronic_dashboard.html', context)
 
 
+@login_required
+@require_GET
+def electronic_archive_feed(request):
+    """
+    API endpoint для догрузки архива панели электронщика по курсору.
+    """
+    if not has_role(request, 'Электронщик'):
+        return JsonResponse({
+            'success': False,
+            'error': 'У вас нет прав для выполнения этой операции'
+        }, status=403)
+
+    archive_equipment, next_cursor = _electronic_archive_page(request.GET.get('cursor'))
+
+    return JsonResponse({
+        'success': True,
+        'equipment': [
+            {
+                'id': equipment.id,
+                'updated_at': timezone.localtime(equipment.updated_at).strftime('%d.%m.%Y %H:%M'),
+                'client': equipment.reception_act.client.short_name,
+                'name': equipment.get_full_name(),
+                'status': equipment.get_status_display(),
+                'status_color': equipment.get_status_color(),
+                'work': _archive_work_summary(equipment),
+            }
+            for equipment in archive_equipment
+        ],
+        'next_cursor': next_cursor,
+    })
+
+
 @login_required
 @role_required('Электронщик')
 def update_equipment_status(request):
@@ -831,11 +1793,16 @@ def update_equipment_status(request):
         new_status = request.POST.get('new_status')
         notes = request.POST.get('notes', '')
 
+        # Статус попадает в неизменяемую историю статусов, поэтому проверяется до сохранения
+        if new_status not in dict(ReceivedEquipment.STATUS_CHOICES):
+            messages.error(request, 'Недопустимый статус')
+            return redirect('electronic_dashboard')
+
         try:
             equipment = ReceivedEquipment.objects.get(id=equipment_id)
 
             # Проверяем, что оборудование относится к цеху электроники
-            if equipment.model.category.department != 'ELECTRON':
+            if equipment.department != 'ELECTRON':
                 messages.error(request, 'Оборудование не относится к цеху электроники')
                 return redirect('electronic_dashboard')
 
@@ -845,17 +1812,22 @@ def update_equipment_status(request):
             # Обновляем статус и назначаем специалиста
             equipment.status = new_status
             equipment.assigned_specialist = user_role
-            equipment.updated_at = timezone.now()
+            changed_fields = ['status', 'assigned_specialist']
 
             if notes:
                 equipment.repair_notes = notes
+                changed_fields.append('repair_notes')
 
-            equipment.save()
+            # Сохраняются только изменённые поля и только если запись не изменили с момента загрузки формы
+            equipment.save(update_fields=changed_fields,
+                           expected_version=_parse_version(request.POST.get('version')))
 
             messages.success(request, f'Статус оборудования обновлен на "{equipment.get_status_display()}"')
 
         except ReceivedEquipment.DoesNotExist:
             messages.error(request, 'Оборудование не найдено')
+        except ReceivedEquipment.VersionConflict:
+            messages.error(request, 'Оборудование уже изменено другим пользователем. Проверьте данные и повторите.')
         except UserRole.DoesNotExist:
             messages.error(request, 'У вас нет активной роли электронщика')
 
@@ -883,14 +1855,16 @@ def add_diagnosis(request):
 
             # Меняем статус на "Диагностировано"
             equipment.status = 'DIAGNOSED'
-            equipment.updated_at = timezone.now()
 
-            equipment.save()
+            equipment.save(update_fields=['diagnosis_result', 'required_parts', 'estimated_cost', 'status'],
+                           expected_version=_parse_version(request.POST.get('version')))
 
             messages.success(request, 'Результаты диагностики сохранены')
 
         except ReceivedEquipment.DoesNotExist:
             messages.error(request, 'Оборудование не найдено')
+        except ReceivedEquipment.VersionConflict:
+            messages.error(request, 'Оборудование уже изменено другим пользователем. Проверьте данные и повторите.')
 
     return redirect('electronic_dashboard')
 
@@ -912,13 +1886,15 @@ def complete_repair(request):
 
             # Меняем статус на "Ремонт закончен"
             equipment.status = 'TESTING'
-            equipment.updated_at = timezone.now()
 
-            equipment.save()
+            equipment.save(update_fields=['repair_notes', 'test_results', 'status'],
+                           expected_version=_parse_version(request.POST.get('version')))
 
             messages.success(request, 'Ремонт успешно завершен')
 
         except ReceivedEquipment.DoesNotExist:
             messages.error(request, 'Оборудование не найдено')
+        except ReceivedEquipment.VersionConflict:
+            messages.error(request, 'Оборудование уже изменено другим пользователем. Проверьте данные и повторите.')
 
     return redirect('electronic_dashboard')
\ No newline at end of file